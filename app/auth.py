@@ -1,6 +1,7 @@
 # app/auth.py
 from __future__ import annotations
 
+import time
 from typing import Optional
 from passlib.context import CryptContext
 
@@ -11,25 +12,54 @@ bcrypt has a hard limit of 72 BYTES. That causes errors for long passwords and
 for multi-byte characters (emoji, Bangla, etc.).
 
 Fix:
-- Use pbkdf2_sha256 as the DEFAULT scheme (supports long passwords).
-- Keep bcrypt to verify existing users who registered before this change.
-- On successful login, auto-upgrade old hashes to pbkdf2_sha256.
+- Use argon2id as the DEFAULT scheme (supports long passwords, and is memory-hard,
+  so GPU/SIMD cracking gets no cheap speed-up the way it does with PBKDF2).
+- Keep pbkdf2_sha256 and bcrypt to verify existing users who registered earlier.
+- On successful login, auto-upgrade old hashes to argon2id.
 """
 
 pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256", "bcrypt"],
+    schemes=["argon2", "pbkdf2_sha256", "bcrypt"],
+    default="argon2",
     deprecated="auto",
+    argon2__type="ID",
+    argon2__memory_cost=65536,
+    argon2__time_cost=3,
+    argon2__parallelism=1,
 )
 
+# Stored hashes carry their scheme in a fixed prefix. Dispatch on it directly
+# instead of letting CryptContext identify the hash on every verify; anything
+# unrecognised still goes through pwd_context.verify().
+_HANDLERS_BY_PREFIX = (
+    ("$argon2", pwd_context.handler("argon2")),
+    ("$pbkdf2-sha256$", pwd_context.handler("pbkdf2_sha256")),
+    ("$2", pwd_context.handler("bcrypt")),
+)
+
+
+class _DigitsOnly(dict):
+    """
+    str.translate table that deletes every non-digit character.
+    Latin-1 is precomputed; other codepoints are checked by __missing__ (same rule as
+    str.isdigit, so Bangla digits etc. still pass through) without being stored.
+    """
+
+    def __missing__(self, cp: int) -> Optional[int]:
+        return cp if chr(cp).isdigit() else None
+
+
+_DIGITS_ONLY = _DigitsOnly((cp, cp if chr(cp).isdigit() else None) for cp in range(256))
+
 
 def normalize_phone(phone: str) -> str:
     """Keep only digits, remove spaces, +, etc."""
-    return "".join(ch for ch in (phone or "") if ch.isdigit())
+    return (phone or "").translate(_DIGITS_ONLY)
 
 
 def normalize_nid(nid: str) -> str:
     """Keep only digits."""
-    return "".join(ch for ch in (nid or "") if ch.isdigit())
+    return (nid or "").translate(_DIGITS_ONLY)
 
 
 def validate_nid(nid_digits: str) -> bool:
@@ -39,14 +69,21 @@ def validate_nid(nid_digits: str) -> bool:
 def hash_password(password: str) -> str:
     if password is None or not str(password).strip():
         raise ValueError("Password is required.")
-    # pbkdf2_sha256 supports long passwords safely.
+    # argon2id supports long passwords safely.
     return pwd_context.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     try:
-        if password is None or password_hash is None:
+        if not password_hash:
             return False
+        # hash_password never accepts blank passwords, so they can't match:
+        # reject them before paying for a KDF run.
+        if password is None or not str(password).strip():
+            return False
+        for prefix, handler in _HANDLERS_BY_PREFIX:
+            if password_hash.startswith(prefix):
+                return handler.verify(password, password_hash)
         return pwd_context.verify(password, password_hash)
     except Exception:
         return False
@@ -61,8 +98,44 @@ def password_hash_needs_update(password_hash: str) -> bool:
         return False
 
 
-def session_login(request, user_id: int) -> None:
+# Non-secret user fields kept in the (signed, not encrypted) session cookie so that
+# current_user doesn't hit the db on every request. The copy is tagged with a version
+# (db.user_generation(user_id)) and re-read when that moves, so role changes made by this
+# process apply on the next request; SESSION_USER_MAX_AGE bounds how long changes
+# made elsewhere (other workers, scripts/) can go unnoticed.
+# The cookie is base64, readable by anyone holding it: no phone or NID in here.
+SESSION_USER_FIELDS = ("id", "role", "is_active", "name")
+SESSION_USER_MAX_AGE = 60
+
+
+def session_cache_user(request, user: dict, version: int = 0) -> None:
+    request.session["u"] = {k: user.get(k) for k in SESSION_USER_FIELDS}
+    request.session["u_ts"] = int(time.time())
+    request.session["u_v"] = int(version)
+
+
+def session_cached_user(request, version: int = 0) -> Optional[dict]:
+    u = request.session.get("u")
+    ts = request.session.get("u_ts")
+    if not isinstance(u, dict) or not isinstance(ts, int):
+        return None
+    if request.session.get("u_v") != version:
+        return None
+    if time.time() - ts > SESSION_USER_MAX_AGE:
+        return None
+    if u.get("id") != session_user_id(request):
+        return None
+    return u
+
+
+def session_login(request, user_id: int, user: Optional[dict] = None, version: int = 0) -> None:
     request.session["user_id"] = int(user_id)
+    if user is not None:
+        session_cache_user(request, {**user, "id": int(user_id)}, version)
+    else:
+        request.session.pop("u", None)
+        request.session.pop("u_ts", None)
+        request.session.pop("u_v", None)
 
 
 def session_logout(request) -> None:
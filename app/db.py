@@ -1,156 +1,393 @@
 # app/db.py
+import itertools
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Iterator
+
+from .nlp import mask_sensitive
 
 DB_PATH = Path(__file__).resolve().parent.parent / "lostfound.sqlite3"
 
+# --------------------
+# Connection pool
+# --------------------
+# Opening SQLite (file open + schema parse + PRAGMAs) on every query costs more
+# than most of our queries. Keep a small pool of long-lived connections instead;
+# they are only closed at process shutdown (see close_pool).
+POOL_SIZE = 8
+
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+_pool_lock = threading.Lock()
+_pool_created = 0
+
+# SQLite allows one writer at a time; a second one spins in busy-wait until the first
+# commits. Queue writers of this process on a lock instead (readers never take it;
+# WAL lets them run alongside the writer).
+_write_lock = threading.Lock()
+
+# Bumped after every successful commit made through transaction(); read caches key
+# on it so any write (from this process) makes them miss.
+_write_gen = 0
+
+# Users whose row the open transaction() changed; their generation moves only once it
+# has committed (see _bump_user_gen). Guarded by _write_lock like the transaction itself.
+_pending_user_bumps: List[int] = []
+
+
+def write_generation() -> int:
+    """Changes whenever this process commits; for caches outside this module."""
+    return _write_gen
+
 
 def connect() -> sqlite3.Connection:
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
+    con = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    # no row_factory: plain tuples are the cheapest rows sqlite3 can hand back;
+    # _row/_rows turn them into dicts using cursor.description
+    # per-connection settings (journal_mode=WAL is persistent, see init_db)
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute("PRAGMA mmap_size=268435456")
+    con.execute("PRAGMA cache_size=-20000")
     return con
 
 
-def _column_exists(con: sqlite3.Connection, table: str, col: str) -> bool:
-    cur = con.cursor()
-    cur.execute(f"PRAGMA table_info({table})")
-    cols = [r[1] for r in cur.fetchall()]
-    return col in cols
+@contextmanager
+def _conn() -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a pooled connection. Connections are created lazily up to POOL_SIZE;
+    after that callers wait for one to be returned.
+    """
+    global _pool_created
+    try:
+        con = _pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            can_create = _pool_created < POOL_SIZE
+            if can_create:
+                _pool_created += 1
+        if can_create:
+            try:
+                con = connect()
+            except Exception:
+                with _pool_lock:
+                    _pool_created -= 1
+                raise
+        else:
+            con = _pool.get()
+
+    try:
+        yield con
+    finally:
+        # never hand a half-finished transaction to the next caller
+        if con.in_transaction:
+            con.rollback()
+        _pool.put(con)
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    One connection, one commit. Write helpers called with con=... inside this block
+    don't commit themselves, so a multi-step workflow costs a single fsync:
+
+        with transaction() as con:
+            update_extracted_json(rid, blob, con=con)
+            set_clarification(rid, key, answer, con=con)
+
+    Writers are serialized on _write_lock, so don't open a second transaction()
+    (or call a write helper without con=) inside the block.
+    """
+    global _write_gen
+    with _write_lock, _conn() as con:
+        try:
+            yield con
+            con.commit()
+        except BaseException:
+            con.rollback()
+            _pending_user_bumps.clear()
+            raise
+        _write_gen += 1
+        for user_id in _pending_user_bumps:
+            _bump_user_gen(user_id)
+        _pending_user_bumps.clear()
+
+
+@contextmanager
+def _writer(con: Optional[sqlite3.Connection]) -> Iterator[sqlite3.Connection]:
+    """Use the caller's transaction if given one, else commit on our own."""
+    if con is not None:
+        yield con
+    else:
+        with transaction() as own:
+            yield own
+
+
+def close_pool() -> None:
+    global _pool_created
+    while True:
+        try:
+            con = _pool.get_nowait()
+        except queue.Empty:
+            break
+        con.close()
+        with _pool_lock:
+            _pool_created -= 1
+
+
+def _columns(con: sqlite3.Connection, table: str) -> set[str]:
+    return {r[1] for r in con.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _row(cur: sqlite3.Cursor) -> Optional[Dict[str, Any]]:
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return dict(zip([d[0] for d in cur.description], row))
+
+
+def _rows(cur: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """
+    Materialize a result set as dicts. Column names are identical for every row of
+    one statement, so read them once and stream rows from the cursor (no fetchall).
+    """
+    keys = [d[0] for d in cur.description]
+    return [dict(zip(keys, r)) for r in cur]
 
 
 def now_utc_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    # same output as datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+    # without building datetime objects on every write
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+
+# set by init_db: whether this sqlite build has FTS5 (reports_fts exists)
+FTS_ENABLED = False
 
 
 def init_db() -> None:
-    con = connect()
-    cur = con.cursor()
-
-    # --------------------
-    # users table (NEW)
-    # --------------------
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            role TEXT NOT NULL CHECK(role IN ('user','office')),
-            name TEXT NOT NULL,
-            phone TEXT NOT NULL UNIQUE,
-            nid TEXT NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_active INTEGER NOT NULL DEFAULT 1,
-            created_at TEXT NOT NULL
-        );
-        """
-    )
-    con.commit()
-
-    # --------------------
-    # reports table
-    # --------------------
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            kind TEXT NOT NULL CHECK(kind IN ('lost','found')),
-            title TEXT NOT NULL,
-            description TEXT NOT NULL,
-            location_text TEXT NOT NULL,
-            event_time TEXT,
-            created_at TEXT NOT NULL,
-            extracted_json TEXT NOT NULL,
-
-            clarify_key TEXT,
-            clarify_answer TEXT,
-            duplicate_of INTEGER
-        );
-        """
-    )
-    con.commit()
-
-    # report migrations (safe auto-migrate)
-    report_migrations = [
-        ("handover_location", "ALTER TABLE reports ADD COLUMN handover_location TEXT"),
-        ("contact_info", "ALTER TABLE reports ADD COLUMN contact_info TEXT"),
-        ("manage_token", "ALTER TABLE reports ADD COLUMN manage_token TEXT"),
-
-        # closing workflow
-        ("is_closed", "ALTER TABLE reports ADD COLUMN is_closed INTEGER DEFAULT 0"),
-        ("closed_at", "ALTER TABLE reports ADD COLUMN closed_at TEXT"),
-        ("closed_claim_id", "ALTER TABLE reports ADD COLUMN closed_claim_id INTEGER"),
-
-        # NEW: ownership
-        ("owner_user_id", "ALTER TABLE reports ADD COLUMN owner_user_id INTEGER"),
-    ]
-    for col, ddl in report_migrations:
-        if not _column_exists(con, "reports", col):
-            cur.execute(ddl)
-    con.commit()
-
-    # --------------------
-    # claims table
-    # --------------------
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS claims (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            lost_report_id INTEGER NOT NULL,
-            found_report_id INTEGER NOT NULL,
-            proof_text TEXT NOT NULL,
-            status TEXT NOT NULL CHECK(status IN ('pending','approved','rejected')),
-            created_at TEXT NOT NULL
-        );
-        """
-    )
-    con.commit()
-
-    # claim migrations
-    claim_migrations = [
-        # office-only snapshot columns
-        ("claimer_name", "ALTER TABLE claims ADD COLUMN claimer_name TEXT"),
-        ("claimer_phone", "ALTER TABLE claims ADD COLUMN claimer_phone TEXT"),
-        ("claimer_nid", "ALTER TABLE claims ADD COLUMN claimer_nid TEXT"),
-        ("office_note", "ALTER TABLE claims ADD COLUMN office_note TEXT"),
-
-        # settlement tracking
-        ("is_settled", "ALTER TABLE claims ADD COLUMN is_settled INTEGER DEFAULT 0"),
-        ("settled_at", "ALTER TABLE claims ADD COLUMN settled_at TEXT"),
-
-        # link claim to logged-in account
-        ("claimer_user_id", "ALTER TABLE claims ADD COLUMN claimer_user_id INTEGER"),
-    ]
-    for col, ddl in claim_migrations:
-        if not _column_exists(con, "claims", col):
-            cur.execute(ddl)
-    con.commit()
-
-    # --------------------
-    # disputes table
-    # --------------------
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS disputes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            claim_id INTEGER NOT NULL,
-            reason TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        );
-        """
-    )
-    con.commit()
-
-    # disputes migrations
-    dispute_migrations = [
-        ("reporter_user_id", "ALTER TABLE disputes ADD COLUMN reporter_user_id INTEGER"),
-    ]
-    for col, ddl in dispute_migrations:
-        if not _column_exists(con, "disputes", col):
-            cur.execute(ddl)
-    con.commit()
+    with _conn() as con:
+        cur = con.cursor()
+
+        # WAL: one fsync per commit instead of two, and readers don't block on writers.
+        # It is stored in the DB file, so doing it once here is enough.
+        cur.execute("PRAGMA journal_mode=WAL")
+
+        # All schema setup + migrations run in ONE transaction (one commit/fsync).
+        # sqlite3 doesn't open transactions for DDL on its own, so BEGIN explicitly.
+        cur.execute("BEGIN")
+
+        # --------------------
+        # users table (NEW)
+        # --------------------
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                role TEXT NOT NULL CHECK(role IN ('user','office')),
+                name TEXT NOT NULL,
+                phone TEXT NOT NULL UNIQUE,
+                nid TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL
+            );
+            """
+        )
 
-    con.close()
+        # --------------------
+        # reports table
+        # --------------------
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL CHECK(kind IN ('lost','found')),
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                location_text TEXT NOT NULL,
+                event_time TEXT,
+                created_at TEXT NOT NULL,
+                extracted_json TEXT NOT NULL,
+
+                clarify_key TEXT,
+                clarify_answer TEXT,
+                duplicate_of INTEGER
+            );
+            """
+        )
+
+        # report migrations (safe auto-migrate)
+        report_migrations = [
+            ("handover_location", "ALTER TABLE reports ADD COLUMN handover_location TEXT"),
+            ("contact_info", "ALTER TABLE reports ADD COLUMN contact_info TEXT"),
+            ("manage_token", "ALTER TABLE reports ADD COLUMN manage_token TEXT"),
+
+            # closing workflow
+            ("is_closed", "ALTER TABLE reports ADD COLUMN is_closed INTEGER DEFAULT 0"),
+            ("closed_at", "ALTER TABLE reports ADD COLUMN closed_at TEXT"),
+            ("closed_claim_id", "ALTER TABLE reports ADD COLUMN closed_claim_id INTEGER"),
+
+            # NEW: ownership
+            ("owner_user_id", "ALTER TABLE reports ADD COLUMN owner_user_id INTEGER"),
+
+            # public (phone/email-masked) text, computed once at insert; see insert_report
+            ("masked_title", "ALTER TABLE reports ADD COLUMN masked_title TEXT"),
+            ("masked_desc", "ALTER TABLE reports ADD COLUMN masked_desc TEXT"),
+            ("masked_loc", "ALTER TABLE reports ADD COLUMN masked_loc TEXT"),
+        ]
+        report_cols = _columns(con, "reports")
+        for col, ddl in report_migrations:
+            if col not in report_cols:
+                cur.execute(ddl)
+
+        # backfill masks for rows written before those columns existed
+        unmasked = cur.execute(
+            "SELECT id, title, description, location_text FROM reports WHERE masked_title IS NULL"
+        ).fetchall()
+        if unmasked:
+            cur.executemany(
+                "UPDATE reports SET masked_title=?, masked_desc=?, masked_loc=? WHERE id=?",
+                [
+                    (mask_sensitive(t), mask_sensitive(d), mask_sensitive(loc), rid)
+                    for rid, t, d, loc in unmasked
+                ],
+            )
+
+        # --------------------
+        # claims table
+        # --------------------
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS claims (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lost_report_id INTEGER NOT NULL,
+                found_report_id INTEGER NOT NULL,
+                proof_text TEXT NOT NULL,
+                status TEXT NOT NULL CHECK(status IN ('pending','approved','rejected')),
+                created_at TEXT NOT NULL
+            );
+            """
+        )
+
+        # claim migrations
+        claim_migrations = [
+            # office-only snapshot columns
+            ("claimer_name", "ALTER TABLE claims ADD COLUMN claimer_name TEXT"),
+            ("claimer_phone", "ALTER TABLE claims ADD COLUMN claimer_phone TEXT"),
+            ("claimer_nid", "ALTER TABLE claims ADD COLUMN claimer_nid TEXT"),
+            ("office_note", "ALTER TABLE claims ADD COLUMN office_note TEXT"),
+
+            # settlement tracking
+            ("is_settled", "ALTER TABLE claims ADD COLUMN is_settled INTEGER DEFAULT 0"),
+            ("settled_at", "ALTER TABLE claims ADD COLUMN settled_at TEXT"),
+
+            # link claim to logged-in account
+            ("claimer_user_id", "ALTER TABLE claims ADD COLUMN claimer_user_id INTEGER"),
+        ]
+        claim_cols = _columns(con, "claims")
+        for col, ddl in claim_migrations:
+            if col not in claim_cols:
+                cur.execute(ddl)
+
+        # --------------------
+        # disputes table
+        # --------------------
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS disputes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                claim_id INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            """
+        )
+
+        # disputes migrations
+        dispute_migrations = [
+            ("reporter_user_id", "ALTER TABLE disputes ADD COLUMN reporter_user_id INTEGER"),
+        ]
+        dispute_cols = _columns(con, "disputes")
+        for col, ddl in dispute_migrations:
+            if col not in dispute_cols:
+                cur.execute(ddl)
+
+        # --------------------
+        # indexes (after migrations: several use migrated columns)
+        # users.phone is already indexed by its UNIQUE constraint.
+        # --------------------
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_reports_owner_kind_id ON reports(owner_user_id, kind, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_kind_closed_id ON reports(kind, is_closed, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_claims_found_id ON claims(found_report_id, id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_claims_user_id ON claims(claimer_user_id, id DESC)",
+            # partial: only settled rows, so has_settled_claim_for_found is one tiny seek
+            "CREATE INDEX IF NOT EXISTS idx_claims_found_settled_partial ON claims(found_report_id) WHERE is_settled=1",
+            "CREATE INDEX IF NOT EXISTS idx_claims_lost_found_status ON claims(lost_report_id, found_report_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_disputes_claim ON disputes(claim_id, id DESC)",
+        ]
+        for ddl in indexes:
+            cur.execute(ddl)
+        # superseded by idx_claims_found_settled_partial
+        cur.execute("DROP INDEX IF EXISTS idx_claims_found_settled")
+
+        # --------------------
+        # full-text index over report text (candidate prefilter, see search_report_ids)
+        # external-content table: the text lives in reports only, triggers keep it in sync
+        # --------------------
+        global FTS_ENABLED
+        try:
+            had_fts = bool(cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='reports_fts'"
+            ).fetchone())
+            cur.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                    title, description, location_text,
+                    content='reports', content_rowid='id'
+                )
+                """
+            )
+            if not had_fts:
+                cur.execute("INSERT INTO reports_fts(reports_fts) VALUES('rebuild')")
+            FTS_ENABLED = True
+        except sqlite3.OperationalError:
+            # sqlite built without FTS5: callers fall back to plain lists
+            FTS_ENABLED = False
+
+        if FTS_ENABLED:
+            triggers = [
+                """
+                CREATE TRIGGER IF NOT EXISTS reports_fts_ai AFTER INSERT ON reports BEGIN
+                    INSERT INTO reports_fts(rowid, title, description, location_text)
+                    VALUES (new.id, new.title, new.description, new.location_text);
+                END
+                """,
+                """
+                CREATE TRIGGER IF NOT EXISTS reports_fts_ad AFTER DELETE ON reports BEGIN
+                    INSERT INTO reports_fts(reports_fts, rowid, title, description, location_text)
+                    VALUES ('delete', old.id, old.title, old.description, old.location_text);
+                END
+                """,
+                """
+                CREATE TRIGGER IF NOT EXISTS reports_fts_au AFTER UPDATE OF title, description, location_text ON reports BEGIN
+                    INSERT INTO reports_fts(reports_fts, rowid, title, description, location_text)
+                    VALUES ('delete', old.id, old.title, old.description, old.location_text);
+                    INSERT INTO reports_fts(rowid, title, description, location_text)
+                    VALUES (new.id, new.title, new.description, new.location_text);
+                END
+                """,
+            ]
+            for ddl in triggers:
+                cur.execute(ddl)
+
+        con.commit()
 
 
 # ========================
@@ -163,54 +400,78 @@ def create_user(
     nid_digits: str,
     password_hash: str,
     role: str = "user",
-) -> int:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        INSERT INTO users(role,name,phone,nid,password_hash,is_active,created_at)
-        VALUES(?,?,?,?,?,?,?)
-        """,
-        (role, name, phone, nid_digits, password_hash, 1, now_utc_iso()),
-    )
-    con.commit()
-    uid = int(cur.lastrowid)
-    con.close()
-    return uid
+    con: Optional[sqlite3.Connection] = None,
+) -> Optional[int]:
+    """
+    Returns the new user id, or None if the phone is already registered.
+    The UNIQUE(phone) check happens inside the INSERT itself, so there is no
+    separate lookup and no race between "check" and "insert".
+    """
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            INSERT INTO users(role,name,phone,nid,password_hash,is_active,created_at)
+            VALUES(?,?,?,?,?,?,?)
+            ON CONFLICT(phone) DO NOTHING
+            RETURNING id
+            """,
+            (role, name, phone, nid_digits, password_hash, 1, now_utc_iso()),
+        )
+        row = cur.fetchone()
+        return int(row[0]) if row else None
 
 
 def get_user_by_phone(phone: str) -> Optional[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM users WHERE phone=?", (phone,))
-    row = cur.fetchone()
-    con.close()
-    return dict(row) if row else None
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM users WHERE phone=?", (phone,))
+        return _row(cur)
 
 
 def get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM users WHERE id=?", (user_id,))
-    row = cur.fetchone()
-    con.close()
-    return dict(row) if row else None
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM users WHERE id=?", (user_id,))
+        return _row(cur)
+
+
+# Per-user version, moved whenever that user's row changes in this process. Copies of
+# the row cached elsewhere (the session) are tagged with it and re-read on mismatch,
+# so a change to one user doesn't invalidate everyone else's cached copy.
+# The versions live in this process only: a change made by another worker or by
+# scripts/ reaches a cached copy here when it expires, after at most
+# auth.SESSION_USER_MAX_AGE (60 s).
+_user_gens: Dict[int, int] = {}
+_user_gen_counter = itertools.count(1)
+
+
+def user_generation(user_id: int) -> int:
+    return _user_gens.get(int(user_id), 0)
+
 
+def _bump_user_gen(user_id: int) -> None:
+    # a fresh value from the shared counter, so concurrent bumps never collide
+    _user_gens[int(user_id)] = next(_user_gen_counter)
 
-def set_user_role(user_id: int, role: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("UPDATE users SET role=? WHERE id=?", (role, user_id))
-    con.commit()
-    con.close()
 
+def _user_changed(user_id: int) -> None:
+    """Call inside a write; the user's generation moves when transaction() commits."""
+    _pending_user_bumps.append(int(user_id))
 
-def update_user_password_hash(user_id: int, new_password_hash: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("UPDATE users SET password_hash=? WHERE id=?", (new_password_hash, user_id))
-    con.commit()
-    con.close()
+
+def set_user_role(user_id: int, role: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute("UPDATE users SET role=? WHERE id=?", (role, user_id))
+        _user_changed(user_id)
+
+
+def update_user_password_hash(user_id: int, new_password_hash: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute("UPDATE users SET password_hash=? WHERE id=?", (new_password_hash, user_id))
+        _user_changed(user_id)
 
 
 # ========================
@@ -226,128 +487,199 @@ def insert_report(
     extracted_json: str,
     duplicate_of: Optional[int] = None,
     owner_user_id: Optional[int] = None,
+    handover_location: Optional[str] = None,
+    contact_info: Optional[str] = None,
+    manage_token: Optional[str] = None,
+    con: Optional[sqlite3.Connection] = None,
 ) -> int:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        INSERT INTO reports(kind,title,description,location_text,event_time,created_at,extracted_json,duplicate_of,owner_user_id)
-        VALUES(?,?,?,?,?,?,?,?,?)
-        """,
-        (kind, title, description, location_text, event_time, now_utc_iso(), extracted_json, duplicate_of, owner_user_id),
-    )
-    con.commit()
-    report_id = int(cur.lastrowid)
-    con.close()
-    return report_id
+    """
+    Found reports pass their handover fields here so the row is written in one
+    INSERT (instead of INSERT + update_found_handover, i.e. two commits).
+    The masked_* columns (what the report page shows) are derived here too: the text
+    never changes after insert, so pages don't re-run mask_sensitive on every view.
+    """
+    masked = (mask_sensitive(title), mask_sensitive(description), mask_sensitive(location_text))
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            INSERT INTO reports(
+                kind,title,description,location_text,event_time,created_at,extracted_json,duplicate_of,owner_user_id,
+                handover_location,contact_info,manage_token,masked_title,masked_desc,masked_loc
+            )
+            VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                kind, title, description, location_text, event_time, now_utc_iso(), extracted_json, duplicate_of, owner_user_id,
+                handover_location, contact_info, manage_token, *masked,
+            ),
+        )
+        return int(cur.lastrowid)
 
 
 def get_report(report_id: int) -> Optional[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-    row = cur.fetchone()
-    con.close()
-    return dict(row) if row else None
-
-
-def list_reports(kind: Optional[str] = None, include_closed: bool = False) -> List[Dict[str, Any]]:
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
+        return _row(cur)
+
+
+def get_reports_bulk(report_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """{id: report} for the given ids in one query (missing ids are left out)."""
+    ids = list(dict.fromkeys(int(i) for i in report_ids))
+    if not ids:
+        return {}
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            f"SELECT * FROM reports WHERE id IN ({','.join('?' * len(ids))})",
+            ids,
+        )
+        return {int(r["id"]): r for r in _rows(cur)}
+
+
+# Report lists are one SELECT with optional filters. The WHERE clause is composed
+# from fixed fragments (not "?1 IS NULL OR kind=?1", which stops SQLite from using
+# the indexes), so there are at most 8 distinct statements and each one stays in
+# the sqlite3 statement cache.
+_OPEN = "(is_closed IS NULL OR is_closed=0)"
+
+# Columns list pages and matching read. Leaves out the secret manage_token and
+# clarification/closing bookkeeping; use get_report for the full row.
+_LIST_COLUMNS = (
+    "id, kind, title, description, location_text, event_time, created_at, extracted_json, "
+    "owner_user_id, handover_location, contact_info, is_closed"
+)
+
+
+@lru_cache(maxsize=None)
+def _list_reports_sql(by_owner: bool, by_kind: bool, include_closed: bool) -> str:
+    where = []
+    if by_owner:
+        where.append("owner_user_id=?")
+    if by_kind:
+        where.append("kind=?")
+    if not include_closed:
+        where.append(_OPEN)
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+    return f"SELECT {_LIST_COLUMNS} FROM reports{clause} ORDER BY id DESC"
+
+
+def _list_reports(
+    kind: Optional[str],
+    include_closed: bool,
+    owner_user_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    sql = _list_reports_sql(owner_user_id is not None, bool(kind), bool(include_closed))
+    params = [p for p in (owner_user_id, kind or None) if p is not None]
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(sql, params)
+        return _rows(cur)
+
+
+# list_reports runs on every page view (home, candidates, duplicate checks) but the
+# table only changes on writes. Cache the result per (kind, include_closed) until the
+# next commit in this process, and at most LIST_CACHE_TTL seconds so writes made by
+# other processes (several uvicorn workers, scripts/) still show up quickly.
+LIST_CACHE_TTL = 2.0
+
+_list_cache: Dict[tuple, tuple] = {}
+# one refill at a time per key: after a write, concurrent callers of the same list
+# wait for a single query instead of all running it; other lists refill in parallel
+_list_cache_locks: Dict[tuple, threading.Lock] = {}
+
+
+def _list_cache_get(key: tuple, gen: int, now: float) -> Optional[List[Dict[str, Any]]]:
+    hit = _list_cache.get(key)
+    if hit is not None and hit[0] == gen and hit[1] > now:
+        return hit[2]
+    return None
+
+
+def list_reports(
+    kind: Optional[str] = None,
+    include_closed: bool = False,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
     By default, closed reports are hidden from lists (homepage, candidates).
+    `limit` keeps only the newest N (copying N rows, not the whole cached list).
+    Rows may be shared with other callers through the cache: don't mutate them.
     """
-    con = connect()
-    cur = con.cursor()
-
-    if kind:
-        if include_closed:
-            cur.execute("SELECT * FROM reports WHERE kind=? ORDER BY id DESC", (kind,))
-        else:
-            cur.execute(
-                "SELECT * FROM reports WHERE kind=? AND (is_closed IS NULL OR is_closed=0) ORDER BY id DESC",
-                (kind,),
-            )
-    else:
-        if include_closed:
-            cur.execute("SELECT * FROM reports ORDER BY id DESC")
-        else:
-            cur.execute("SELECT * FROM reports WHERE (is_closed IS NULL OR is_closed=0) ORDER BY id DESC")
-
-    rows = [dict(r) for r in cur.fetchall()]
-    con.close()
-    return rows
+    key = (kind or None, bool(include_closed))
+    gen = _write_gen
+    rows = _list_cache_get(key, gen, time.monotonic())
+    if rows is None:
+        # setdefault is atomic, so racing callers still end up sharing one lock
+        with _list_cache_locks.setdefault(key, threading.Lock()):
+            rows = _list_cache_get(key, gen, time.monotonic())
+            if rows is None:
+                rows = _list_reports(kind, include_closed)
+                _list_cache[key] = (gen, time.monotonic() + LIST_CACHE_TTL, rows)
+    return rows[:limit] if limit is not None else list(rows)
+
+
+def search_report_ids(kind: str, terms: List[str], limit: int = 50) -> Optional[List[int]]:
+    """
+    Ids of open reports of `kind` whose text contains any of `terms`, best FTS rank
+    first. Returns None when full-text search isn't available (caller should use
+    list_reports instead); [] means "nothing shares a word".
+    """
+    if not FTS_ENABLED:
+        return None
+    terms = list(dict.fromkeys(t for t in terms if t))
+    if not terms:
+        return []
+    query = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            f"""
+            SELECT r.id FROM reports_fts f JOIN reports r ON r.id = f.rowid
+            WHERE reports_fts MATCH ? AND r.kind=? AND {_OPEN}
+            ORDER BY f.rank LIMIT ?
+            """,
+            (query, kind, limit),
+        )
+        return [int(r[0]) for r in cur]
 
 
 def list_reports_for_user(user_id: int, kind: Optional[str] = None, include_closed: bool = True) -> List[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
+    return _list_reports(kind, include_closed, owner_user_id=user_id)
 
-    if kind:
-        if include_closed:
-            cur.execute(
-                "SELECT * FROM reports WHERE owner_user_id=? AND kind=? ORDER BY id DESC",
-                (user_id, kind),
-            )
-        else:
-            cur.execute(
-                "SELECT * FROM reports WHERE owner_user_id=? AND kind=? AND (is_closed IS NULL OR is_closed=0) ORDER BY id DESC",
-                (user_id, kind),
-            )
-    else:
-        if include_closed:
-            cur.execute(
-                "SELECT * FROM reports WHERE owner_user_id=? ORDER BY id DESC",
-                (user_id,),
-            )
-        else:
-            cur.execute(
-                "SELECT * FROM reports WHERE owner_user_id=? AND (is_closed IS NULL OR is_closed=0) ORDER BY id DESC",
-                (user_id,),
-            )
 
-    rows = [dict(r) for r in cur.fetchall()]
-    con.close()
-    return rows
+def update_extracted_json(report_id: int, extracted_json: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute("UPDATE reports SET extracted_json=? WHERE id=?", (extracted_json, report_id))
 
 
-def update_extracted_json(report_id: int, extracted_json: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("UPDATE reports SET extracted_json=? WHERE id=?", (extracted_json, report_id))
-    con.commit()
-    con.close()
-
-
-def set_clarification(report_id: int, key: str, answer: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE reports SET clarify_key=?, clarify_answer=? WHERE id=?",
-        (key, answer, report_id),
-    )
-    con.commit()
-    con.close()
+def set_clarification(report_id: int, key: str, answer: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE reports SET clarify_key=?, clarify_answer=? WHERE id=?",
+            (key, answer, report_id),
+        )
 
 
-def update_found_handover(found_id: int, handover_location: str, contact_info: str, manage_token: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE reports SET handover_location=?, contact_info=?, manage_token=? WHERE id=?",
-        (handover_location, contact_info, manage_token, found_id),
-    )
-    con.commit()
-    con.close()
+def update_found_handover(found_id: int, handover_location: str, contact_info: str, manage_token: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE reports SET handover_location=?, contact_info=?, manage_token=? WHERE id=?",
+            (handover_location, contact_info, manage_token, found_id),
+        )
 
 
-def close_report(report_id: int, closed_claim_id: Optional[int] = None) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE reports SET is_closed=1, closed_at=?, closed_claim_id=? WHERE id=?",
-        (now_utc_iso(), closed_claim_id, report_id),
-    )
-    con.commit()
-    con.close()
+def close_report(report_id: int, closed_claim_id: Optional[int] = None, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE reports SET is_closed=1, closed_at=?, closed_claim_id=? WHERE id=?",
+            (now_utc_iso(), closed_claim_id, report_id),
+        )
 
 
 # ========================
@@ -362,114 +694,199 @@ def create_claim(
     claimer_name: str = "",
     claimer_phone: str = "",
     claimer_nid: str = "",
+    con: Optional[sqlite3.Connection] = None,
 ) -> int:
     """
     We store BOTH:
       - claimer_user_id (link to account)
       - snapshot fields (name/phone/nid) for office audit later
     """
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        INSERT INTO claims(
-            lost_report_id,found_report_id,proof_text,status,created_at,
-            claimer_user_id,claimer_name,claimer_phone,claimer_nid,
-            is_settled,settled_at
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            INSERT INTO claims(
+                lost_report_id,found_report_id,proof_text,status,created_at,
+                claimer_user_id,claimer_name,claimer_phone,claimer_nid,
+                is_settled,settled_at
+            )
+            VALUES(?,?,?,?,?,?,?,?,?,?,?)
+            """,
+            (
+                lost_id,
+                found_id,
+                proof_text,
+                "pending",
+                now_utc_iso(),
+                claimer_user_id,
+                claimer_name,
+                claimer_phone,
+                claimer_nid,
+                0,
+                None,
+            ),
         )
-        VALUES(?,?,?,?,?,?,?,?,?,?,?)
-        """,
-        (
-            lost_id,
-            found_id,
-            proof_text,
-            "pending",
-            now_utc_iso(),
-            claimer_user_id,
-            claimer_name,
-            claimer_phone,
-            claimer_nid,
-            0,
-            None,
-        ),
-    )
-    con.commit()
-    cid = int(cur.lastrowid)
-    con.close()
-    return cid
+        return int(cur.lastrowid)
 
 
 def list_claims_for_found(found_id: int) -> List[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM claims WHERE found_report_id=? ORDER BY id DESC", (found_id,))
-    rows = [dict(r) for r in cur.fetchall()]
-    con.close()
-    return rows
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM claims WHERE found_report_id=? ORDER BY id DESC", (found_id,))
+        return _rows(cur)
+
+
+def list_claims_for_found_with_lost(found_id: int) -> List[Dict[str, Any]]:
+    """
+    Like list_claims_for_found, plus the claimed lost report's title as lost_title
+    (joined in SQL instead of one get_report per claim).
+    """
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT c.*, l.title AS lost_title
+            FROM claims c LEFT JOIN reports l ON l.id = c.lost_report_id
+            WHERE c.found_report_id=?
+            ORDER BY c.id DESC
+            """,
+            (found_id,),
+        )
+        return _rows(cur)
 
 
 def list_claims_for_user(user_id: int) -> List[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM claims WHERE claimer_user_id=? ORDER BY id DESC", (user_id,))
-    rows = [dict(r) for r in cur.fetchall()]
-    con.close()
-    return rows
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM claims WHERE claimer_user_id=? ORDER BY id DESC", (user_id,))
+        return _rows(cur)
 
 
 def get_claim(claim_id: int) -> Optional[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM claims WHERE id=?", (claim_id,))
-    row = cur.fetchone()
-    con.close()
-    return dict(row) if row else None
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM claims WHERE id=?", (claim_id,))
+        return _row(cur)
 
 
-def set_claim_status(claim_id: int, status: str) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("UPDATE claims SET status=? WHERE id=?", (status, claim_id))
-    con.commit()
-    con.close()
+def get_claim_with_found(claim_id: int) -> Optional[Dict[str, Any]]:
+    """
+    get_claim plus what the found-report owner's manage actions check, joined in:
+    found_manage_token and found_is_closed (both None if the found report is gone).
+    """
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT c.*, f.manage_token AS found_manage_token, f.is_closed AS found_is_closed
+            FROM claims c LEFT JOIN reports f ON f.id = c.found_report_id
+            WHERE c.id=?
+            """,
+            (claim_id,),
+        )
+        return _row(cur)
 
 
-def settle_claim(claim_id: int) -> None:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "UPDATE claims SET is_settled=1, settled_at=? WHERE id=?",
-        (now_utc_iso(), claim_id),
-    )
-    con.commit()
-    con.close()
+def get_claim_with_titles(claim_id: int) -> Optional[Dict[str, Any]]:
+    """
+    get_claim plus the titles of the claimed lost and found reports, joined in as
+    lost_title and found_title (None if a report is gone). For the office claim page.
+    """
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT c.*, l.title AS lost_title, f.title AS found_title
+            FROM claims c
+            LEFT JOIN reports l ON l.id = c.lost_report_id
+            LEFT JOIN reports f ON f.id = c.found_report_id
+            WHERE c.id=?
+            """,
+            (claim_id,),
+        )
+        return _row(cur)
+
+
+def set_claim_status(claim_id: int, status: str, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute("UPDATE claims SET status=? WHERE id=?", (status, claim_id))
+
+
+def settle_claim(claim_id: int, con: Optional[sqlite3.Connection] = None) -> None:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE claims SET is_settled=1, settled_at=? WHERE id=?",
+            (now_utc_iso(), claim_id),
+        )
+
+
+def settle_claim_and_close_reports(claim_id: int, con: Optional[sqlite3.Connection] = None) -> None:
+    """
+    Settle a claim and close its lost + found reports in ONE transaction
+    (settle_claim + 2x close_report would be three commits).
+    """
+    now = now_utc_iso()
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE claims SET is_settled=1, settled_at=? WHERE id=? RETURNING lost_report_id, found_report_id",
+            (now, claim_id),
+        )
+        row = cur.fetchone()
+        if row:
+            cur.execute(
+                "UPDATE reports SET is_closed=1, closed_at=?, closed_claim_id=? WHERE id IN (?,?)",
+                (now, claim_id, row[0], row[1]),
+            )
 
 
 def get_approved_claim(lost_id: int, found_id: int) -> Optional[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT * FROM claims
-        WHERE lost_report_id=? AND found_report_id=? AND status='approved'
-        ORDER BY id DESC LIMIT 1
-        """,
-        (lost_id, found_id),
-    )
-    row = cur.fetchone()
-    con.close()
-    return dict(row) if row else None
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT * FROM claims
+            WHERE lost_report_id=? AND found_report_id=? AND status='approved'
+            ORDER BY id DESC LIMIT 1
+            """,
+            (lost_id, found_id),
+        )
+        return _row(cur)
+
+
+def get_approved_claims_for_lost(lost_id: int) -> Dict[int, Dict[str, Any]]:
+    """
+    {found_id: latest approved claim} for one lost report: get_approved_claim for
+    every found report at once (a single seek on idx_claims_lost_found_status).
+    """
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT * FROM claims
+            WHERE lost_report_id=? AND status='approved'
+            """,
+            (lost_id,),
+        )
+        # latest per found report, picked here instead of an ORDER BY sort
+        out: Dict[int, Dict[str, Any]] = {}
+        for c in _rows(cur):
+            prev = out.get(int(c["found_report_id"]))
+            if prev is None or c["id"] > prev["id"]:
+                out[int(c["found_report_id"])] = c
+        return out
 
 
 def has_settled_claim_for_found(found_id: int) -> bool:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "SELECT 1 FROM claims WHERE found_report_id=? AND is_settled=1 LIMIT 1",
-        (found_id,),
-    )
-    row = cur.fetchone()
-    con.close()
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            "SELECT 1 FROM claims WHERE found_report_id=? AND is_settled=1 LIMIT 1",
+            (found_id,),
+        )
+        row = cur.fetchone()
     return bool(row)
 
 
@@ -477,23 +894,27 @@ def has_settled_claim_for_found(found_id: int) -> bool:
 # Disputes
 # ========================
 
-def create_dispute(claim_id: int, reason: str, reporter_user_id: Optional[int] = None) -> int:
-    con = connect()
-    cur = con.cursor()
-    cur.execute(
-        "INSERT INTO disputes(claim_id,reason,created_at,reporter_user_id) VALUES(?,?,?,?)",
-        (claim_id, reason, now_utc_iso(), reporter_user_id),
-    )
-    con.commit()
-    did = int(cur.lastrowid)
-    con.close()
-    return did
+def create_dispute(claim_id: int, reason: str, reporter_user_id: Optional[int] = None, con: Optional[sqlite3.Connection] = None) -> int:
+    with _writer(con) as con:
+        cur = con.cursor()
+        cur.execute(
+            "INSERT INTO disputes(claim_id,reason,created_at,reporter_user_id) VALUES(?,?,?,?)",
+            (claim_id, reason, now_utc_iso(), reporter_user_id),
+        )
+        return int(cur.lastrowid)
 
 
 def list_disputes_for_claim(claim_id: int) -> List[Dict[str, Any]]:
-    con = connect()
-    cur = con.cursor()
-    cur.execute("SELECT * FROM disputes WHERE claim_id=? ORDER BY id DESC", (claim_id,))
-    rows = [dict(r) for r in cur.fetchall()]
-    con.close()
-    return rows
+    """Newest first, with the reporting account's name/phone as reporter_name/reporter_phone."""
+    with _conn() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT d.*, u.name AS reporter_name, u.phone AS reporter_phone
+            FROM disputes d LEFT JOIN users u ON u.id = d.reporter_user_id
+            WHERE d.claim_id=?
+            ORDER BY d.id DESC
+            """,
+            (claim_id,),
+        )
+        return _rows(cur)
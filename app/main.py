@@ -1,13 +1,19 @@
 # app/main.py
+from dataclasses import dataclass
 from pathlib import Path
-import secrets
-
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import RedirectResponse, HTMLResponse
+import asyncio
+import hashlib
+import os
+import time
+
+from fastapi import BackgroundTasks, FastAPI, Request, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
-from starlette.middleware.sessions import SessionMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 
 from .auth import (
     normalize_phone,
@@ -19,35 +25,44 @@ from .auth import (
     session_login,
     session_logout,
     session_user_id,
+    session_cache_user,
+    session_cached_user,
 )
 
 from .db import (
     init_db,
+    close_pool,
+    transaction,
+    write_generation,
+    LIST_CACHE_TTL,
 
     # users
     create_user,
     get_user_by_phone,
     get_user_by_id,
     update_user_password_hash,
+    user_generation,
     list_reports_for_user,
     list_claims_for_user,
 
     # reports/claims
     insert_report,
     get_report,
+    get_reports_bulk,
     list_reports,
+    search_report_ids,
     set_clarification,
     update_extracted_json,
-    update_found_handover,
 
     create_claim,
-    list_claims_for_found,
+    list_claims_for_found_with_lost,
     get_claim,
+    get_claim_with_titles,
+    get_claim_with_found,
     set_claim_status,
-    get_approved_claim,
+    get_approved_claims_for_lost,
 
-    close_report,
-    settle_claim,
+    settle_claim_and_close_reports,
     has_settled_claim_for_found,
     create_dispute,
     list_disputes_for_claim,
@@ -56,28 +71,76 @@ from .db import (
 from .nlp import (
     extract,
     dumps_extracted,
-    loads_extracted,
     mask_sensitive,
     apply_clarification,
+    tokenize,
 )
 
-from .matching import rank_matches, choose_clarifying_question, compute_match
+from .matching import (
+    rank_matches,
+    choose_clarifying_question,
+    find_duplicate,
+    needs_clarification,
+    prepare_report,
+)
+from .sessions import SignedCookieSessionMiddleware
+from .tokens import get_manage_token
 
 
 app = FastAPI(title="Lost & Found Matcher")
 
 # IMPORTANT: change this in production
 SESSION_SECRET = "dev-session-secret-change-me"
-app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET)
+# when rotating: put the old secret here so existing sessions survive the switch
+SESSION_OLD_SECRETS: list = []
+app.add_middleware(
+    SignedCookieSessionMiddleware,
+    secret_key=SESSION_SECRET,
+    fallback_secret_keys=SESSION_OLD_SECRETS,
+)
+# rendered pages are mostly markup and compress well
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Paths and settings derived once at import; never recomputed per request."""
+    base_dir: Path
+    templates_dir: Path
+    static_dir: Path
+
 
 BASE_DIR = Path(__file__).resolve().parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+CONFIG = Config(
+    base_dir=BASE_DIR,
+    templates_dir=BASE_DIR / "templates",
+    static_dir=BASE_DIR / "static",
+)
+app.state.cfg = CONFIG
+
+# Same settings Jinja2Templates(directory=...) would use (autoescape on), plus:
+# no mtime check on every render, and compiled template code cached on disk so a
+# restarted worker skips re-compiling. Templates are pre-loaded in _startup.
+# Set JINJA_AUTO_RELOAD=1 while editing templates to get the mtime check back.
+_jinja_env = Environment(
+    loader=FileSystemLoader(str(CONFIG.templates_dir)),
+    autoescape=True,
+    auto_reload=os.environ.get("JINJA_AUTO_RELOAD") == "1",
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+templates = Jinja2Templates(env=_jinja_env)
+app.mount("/static", StaticFiles(directory=str(CONFIG.static_dir)), name="static")
 
 
 @app.on_event("startup")
 def _startup():
     init_db()
+    for name in _jinja_env.list_templates():
+        _jinja_env.get_template(name)
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    close_pool()
 
 
 # ----------------------------
@@ -85,17 +148,98 @@ def _startup():
 # ----------------------------
 
 def current_user(request: Request):
+    """
+    The logged-in user's public fields (see SESSION_USER_FIELDS), from the session
+    when fresh, else from the db. Routes that need anything else (e.g. nid) should
+    load the full row with get_user_by_id.
+    """
     uid = session_user_id(request)
     if not uid:
         return None
-    u = get_user_by_id(uid)
-    if not u:
-        return None
+    version = user_generation(uid)
+    u = session_cached_user(request, version)
+    if u is None:
+        u = get_user_by_id(uid)
+        if not u:
+            return None
+        session_cache_user(request, u, version)
     if int(u.get("is_active") or 0) != 1:
         return None
     return u
 
 
+# Above this many open reports, only score the ones that share a word with the report
+# (full-text prefilter) instead of brute-forcing the whole list. The limit matches
+# rank_matches' TF-IDF shortlist, so the prefilter never keeps fewer than that would.
+FTS_PREFILTER_MIN = 200
+FTS_PREFILTER_LIMIT = 200
+
+# /submit checks the newest reports of the same kind for a duplicate
+DUPLICATE_WINDOW = 200
+
+
+def match_candidates(kind: str, r: dict, pool: list) -> list:
+    """
+    Narrow `pool` (open reports of `kind`) to plausible matches for report `r`.
+    Reports sharing an identifier or the item type with `r` are always kept, ahead of
+    the full-text hits: those score high without sharing a word.
+    """
+    if len(pool) <= FTS_PREFILTER_MIN:
+        return pool
+    terms = tokenize(f"{r.get('title','')} {r.get('description','')} {r.get('location_text','')}")
+    ids = search_report_ids(kind, terms[:32], limit=FTS_PREFILTER_LIMIT)
+
+    cur = prepare_report(r)
+    item_type = cur.ex.get("item_type")
+    same_ident, same_type = [], []
+    for c in pool:
+        p = prepare_report(c)
+        if cur.identifiers and not cur.identifiers.isdisjoint(p.identifiers):
+            same_ident.append(c)
+        elif item_type and p.ex.get("item_type") == item_type:
+            same_type.append(c)
+
+    if ids:
+        by_id = {int(c["id"]): c for c in pool}
+        hits = [by_id[i] for i in ids if i in by_id]
+    else:
+        # no full-text search, or nothing shares a word (e.g. misspelled reports):
+        # fall back to the newest reports so they are still scored
+        hits = pool[:FTS_PREFILTER_MIN]
+    # identifier matches first: rank_matches' no-sklearn fallback keeps the head
+    shortlist = {int(c["id"]): c for c in same_ident}
+    for c in hits + same_type:
+        shortlist.setdefault(int(c["id"]), c)
+    return list(shortlist.values())
+
+
+def check_duplicate(kind: str, current: dict):
+    """Id of an open report of `kind` that `current` (not saved yet) duplicates, or None."""
+    # not match_candidates: a duplicate must not hinge on the full-text shortlist
+    return find_duplicate(current, list_reports(kind)[:DUPLICATE_WINDOW])
+
+
+def conditional(request: Request, response: Response) -> Response:
+    """
+    ETag a rendered page by its body. If the browser already holds exactly this page
+    (If-None-Match), answer 304 and skip sending it again.
+    """
+    etag = '"' + hashlib.blake2b(response.body, digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in (t.strip() for t in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+# Static error bodies, as bytes: HTMLResponse passes bytes through instead of
+# encoding the str on every (often scanner-driven) failed request.
+_ERR_LOGIN = b"Invalid phone or password."
+_ERR_NOT_FOUND = b"Not found"
+_ERR_UNAUTHORIZED = b"Unauthorized"
+_ERR_PHONE_TAKEN = b"This phone number is already registered."
+
+
 def require_login_redirect(request: Request):
     return RedirectResponse(url="/login", status_code=303)
 
@@ -109,8 +253,8 @@ def require_office(user: dict) -> bool:
 # ----------------------------
 
 @app.get("/login", response_class=HTMLResponse)
-def login_page(request: Request):
-    u = current_user(request)
+async def login_page(request: Request):
+    u = await run_in_threadpool(current_user, request)
     if u:
         return RedirectResponse(url="/", status_code=303)
 
@@ -120,36 +264,43 @@ def login_page(request: Request):
     )
 
 
+def _rehash_password(user_id: int, password: str) -> None:
+    try:
+        update_user_password_hash(user_id, hash_password(password))
+    except Exception:
+        # Not fatal: user can still log in
+        pass
+
+
 @app.post("/login")
-def login_submit(
+async def login_submit(
     request: Request,
+    background_tasks: BackgroundTasks,
     phone: str = Form(...),
     password: str = Form(...),
 ):
     phone_norm = normalize_phone(phone)
-    u = get_user_by_phone(phone_norm)
+    u = await run_in_threadpool(get_user_by_phone, phone_norm)
     if not u or int(u.get("is_active") or 0) != 1:
-        return HTMLResponse("Invalid phone or password.", status_code=400)
+        return HTMLResponse(_ERR_LOGIN, status_code=400)
+    version = user_generation(u["id"])
 
-    if not verify_password(password, u["password_hash"]):
-        return HTMLResponse("Invalid phone or password.", status_code=400)
+    if not await run_in_threadpool(verify_password, password, u["password_hash"]):
+        return HTMLResponse(_ERR_LOGIN, status_code=400)
 
-    # ✅ Auto-upgrade old bcrypt hashes to pbkdf2_sha256 on successful login
+    # ✅ Auto-upgrade old bcrypt/pbkdf2_sha256 hashes to argon2id on successful login.
+    # Runs (in the threadpool) after the redirect is sent; the user doesn't wait for
+    # the KDF + write.
     if password_hash_needs_update(u["password_hash"]):
-        try:
-            new_hash = hash_password(password)
-            update_user_password_hash(int(u["id"]), new_hash)
-        except Exception:
-            # Not fatal: user can still log in
-            pass
-
-    session_login(request, int(u["id"]))
+        background_tasks.add_task(_rehash_password, int(u["id"]), password)
+
+    session_login(request, int(u["id"]), u, version)
     return RedirectResponse(url="/", status_code=303)
 
 
 @app.get("/register", response_class=HTMLResponse)
-def register_page(request: Request):
-    u = current_user(request)
+async def register_page(request: Request):
+    u = await run_in_threadpool(current_user, request)
     if u:
         return RedirectResponse(url="/", status_code=303)
 
@@ -160,7 +311,7 @@ def register_page(request: Request):
 
 
 @app.post("/register")
-def register_submit(
+async def register_submit(
     request: Request,
     name: str = Form(...),
     phone: str = Form(...),
@@ -172,23 +323,25 @@ def register_submit(
     nid_digits = normalize_nid(nid)
 
     if not name_clean:
-        return HTMLResponse("Name is required.", status_code=400)
+        return HTMLResponse(b"Name is required.", status_code=400)
 
     if len(phone_norm) < 8:
-        return HTMLResponse("Phone looks invalid.", status_code=400)
+        return HTMLResponse(b"Phone looks invalid.", status_code=400)
 
     if not validate_nid(nid_digits):
-        return HTMLResponse("NID must be 13 or 18 digits.", status_code=400)
+        return HTMLResponse(b"NID must be 13 or 18 digits.", status_code=400)
 
     if len(password or "") < 6:
-        return HTMLResponse("Password must be at least 6 characters.", status_code=400)
+        return HTMLResponse(b"Password must be at least 6 characters.", status_code=400)
 
-    if get_user_by_phone(phone_norm):
-        return HTMLResponse("This phone number is already registered.", status_code=400)
+    # Taken phone: answer with one cheap query instead of hashing first.
+    # (create_user's UNIQUE check below still catches a concurrent registration.)
+    if await run_in_threadpool(get_user_by_phone, phone_norm):
+        return HTMLResponse(_ERR_PHONE_TAKEN, status_code=400)
 
-    # ✅ Now supports long passwords (pbkdf2_sha256)
+    # ✅ Now supports long passwords (argon2id)
     try:
-        password_hash = hash_password(password)
+        password_hash = await run_in_threadpool(hash_password, password)
     except Exception as e:
         return templates.TemplateResponse(
             "register.html",
@@ -202,20 +355,28 @@ def register_submit(
             status_code=400,
         )
 
-    uid = create_user(
+    uid = await run_in_threadpool(
+        create_user,
         name=name_clean,
         phone=phone_norm,
         nid_digits=nid_digits,
         password_hash=password_hash,
         role="user",
     )
-
-    session_login(request, uid)
+    if uid is None:
+        return HTMLResponse(_ERR_PHONE_TAKEN, status_code=400)
+
+    session_login(
+        request,
+        uid,
+        {"role": "user", "is_active": 1, "name": name_clean},
+        user_generation(uid),
+    )
     return RedirectResponse(url="/", status_code=303)
 
 
 @app.post("/logout")
-def logout(request: Request):
+async def logout(request: Request):
     session_logout(request)
     return RedirectResponse(url="/login", status_code=303)
 
@@ -225,16 +386,18 @@ def logout(request: Request):
 # ----------------------------
 
 @app.get("/me", response_class=HTMLResponse)
-def me(request: Request):
-    u = current_user(request)
+async def me(request: Request):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    my_lost = list_reports_for_user(int(u["id"]), kind="lost", include_closed=True)
-    my_found = list_reports_for_user(int(u["id"]), kind="found", include_closed=True)
-    my_claims = list_claims_for_user(int(u["id"]))
+    # one query for both kinds, split here (rows stay in id DESC order)
+    my_reports = await run_in_threadpool(list_reports_for_user, int(u["id"]), include_closed=True)
+    my_lost = [r for r in my_reports if r["kind"] == "lost"]
+    my_found = [r for r in my_reports if r["kind"] == "found"]
+    my_claims = await run_in_threadpool(list_claims_for_user, int(u["id"]))
 
-    return templates.TemplateResponse(
+    return conditional(request, templates.TemplateResponse(
         "me.html",
         {
             "request": request,
@@ -243,29 +406,50 @@ def me(request: Request):
             "my_found": my_found,
             "my_claims": my_claims,
         },
-    )
+    ))
 
 
 # ----------------------------
 # App routes (LOGIN REQUIRED)
 # ----------------------------
+# Routes are async and push their sqlite/matching/KDF work to the threadpool one
+# call at a time, so a slow request only holds a worker thread while it's actually
+# blocking.
+
+# (role, name) -> (write generation, expires at, rendered body)
+_home_html_cache: dict = {}
+HOME_CACHE_MAX = 1024
+
 
 @app.get("/", response_class=HTMLResponse)
-def home(request: Request):
-    u = current_user(request)
+async def home(request: Request):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    lost = list_reports("lost")[:10]
-    found = list_reports("found")[:10]
-    return templates.TemplateResponse(
+    # The page only varies by the latest reports and the user's name/role, so keep
+    # the rendered body (same lifetime rules as the list cache) and skip Jinja.
+    key = (u.get("role"), u.get("name"))
+    gen = write_generation()
+    now = time.monotonic()
+    hit = _home_html_cache.get(key)
+    if hit is not None and hit[0] == gen and hit[1] > now:
+        return conditional(request, HTMLResponse(hit[2]))
+
+    lost = await run_in_threadpool(list_reports, "lost", limit=10)
+    found = await run_in_threadpool(list_reports, "found", limit=10)
+    response = templates.TemplateResponse(
         "index.html",
         {"request": request, "user": u, "lost": lost, "found": found},
     )
+    if len(_home_html_cache) >= HOME_CACHE_MAX:
+        _home_html_cache.clear()
+    _home_html_cache[key] = (gen, now + LIST_CACHE_TTL, response.body)
+    return conditional(request, response)
 
 
 @app.post("/submit")
-def submit(
+async def submit(
     request: Request,
     kind: str = Form(...),
     title: str = Form(...),
@@ -275,45 +459,31 @@ def submit(
     handover_location: str = Form(""),
     contact_info: str = Form(""),
 ):
-    u = current_user(request)
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
     combined = f"{title}\n{description}\n{location_text}"
-    ex = extract(combined)
+    ex = await run_in_threadpool(extract, combined)
 
     manage_token = None
     if kind == "found":
-        manage_token = secrets.token_urlsafe(16)
-
-    same_kind = list_reports(kind)
-    duplicate_of = None
-
-    if same_kind:
-        recent = same_kind[:200]
-        best_score = None
-        best_id = None
-
-        dummy_current = {
-            "id": -1,
-            "kind": kind,
-            "title": title,
-            "description": description,
-            "location_text": location_text,
-            "event_time": (event_time.strip() if event_time else None),
-            "extracted_json": dumps_extracted(ex),
-        }
-
-        for c in recent:
-            m = compute_match(dummy_current, c)
-            if best_score is None or m.score > best_score:
-                best_score = m.score
-                best_id = c["id"]
-
-        if best_score is not None and best_score >= 0.85:
-            duplicate_of = int(best_id)
-
-    rid = insert_report(
+        manage_token = get_manage_token()
+
+    dummy_current = {
+        "id": -1,
+        "kind": kind,
+        "title": title,
+        "description": description,
+        "location_text": location_text,
+        "event_time": (event_time.strip() if event_time else None),
+        "extracted_json": dumps_extracted(ex),
+    }
+    duplicate_of = await run_in_threadpool(check_duplicate, kind, dummy_current)
+
+    is_found = kind == "found"
+    rid = await run_in_threadpool(
+        insert_report,
         kind=kind,
         title=title.strip(),
         description=description.strip(),
@@ -322,59 +492,67 @@ def submit(
         extracted_json=dumps_extracted(ex),
         duplicate_of=duplicate_of,
         owner_user_id=int(u["id"]),
+        handover_location=(handover_location.strip() or "Public help desk/security point.") if is_found else None,
+        contact_info=contact_info.strip() if is_found else None,
+        manage_token=manage_token,
     )
 
-    if kind == "found":
-        update_found_handover(
-            found_id=rid,
-            handover_location=handover_location.strip() or "Public help desk/security point.",
-            contact_info=contact_info.strip(),
-            manage_token=manage_token,
-        )
+    if is_found:
         return RedirectResponse(url=f"/report/{rid}?created=1", status_code=303)
 
     return RedirectResponse(url=f"/report/{rid}", status_code=303)
 
 
 @app.get("/report/{report_id}", response_class=HTMLResponse)
-def view_report(request: Request, report_id: int):
-    u = current_user(request)
+async def view_report(request: Request, report_id: int):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    r = get_report(report_id)
+    r = await run_in_threadpool(get_report, report_id)
     if not r:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
     created = (request.query_params.get("created") == "1")
 
-    masked_title = mask_sensitive(r["title"])
-    masked_desc = mask_sensitive(r["description"])
-    masked_loc = mask_sensitive(r["location_text"])
+    # stored at insert; only rows written by something other than insert_report lack them
+    masked_title = r.get("masked_title") or mask_sensitive(r["title"])
+    masked_desc = r.get("masked_desc") or mask_sensitive(r["description"])
+    masked_loc = r.get("masked_loc") or mask_sensitive(r["location_text"])
 
-    r_ex = loads_extracted(r["extracted_json"])
+    # parsed once per report version (the matcher's feature cache); read-only
+    r_ex = prepare_report(r).ex
 
     opposite = "found" if r["kind"] == "lost" else "lost"
-    candidates = list_reports(opposite)
-    matches = rank_matches(r, candidates, k=5)
-
-    ask_question = False
-    if len(matches) >= 2:
-        top1 = matches[0].score
-        top2 = matches[1].score
-        if (top1 < 0.55) or ((top1 - top2) < 0.08):
-            ask_question = True
-    elif len(matches) == 1:
-        ask_question = matches[0].score < 0.55
+    is_closed = int(r.get("is_closed") or 0) == 1
+
+    async def _rank():
+        shortlist = await run_in_threadpool(match_candidates, opposite, r, candidates)
+        return await run_in_threadpool(rank_matches, r, shortlist, k=5)
+
+    if is_closed:
+        # settled: no matches panel, no new claims, no question, so nothing to rank;
+        # a lost report still shows its approved claims (pickup details, disputes)
+        candidates, matches = [], []
+        if r["kind"] == "lost":
+            approved_by_found = await run_in_threadpool(get_approved_claims_for_lost, int(r["id"]))
+        else:
+            approved_by_found = {}
     else:
-        ask_question = True
+        candidates = await run_in_threadpool(list_reports, opposite)
+        # a lost report's approved claims don't depend on the ranking: fetch them meanwhile
+        if r["kind"] == "lost":
+            matches, approved_by_found = await asyncio.gather(
+                _rank(),
+                run_in_threadpool(get_approved_claims_for_lost, int(r["id"])),
+            )
+        else:
+            matches, approved_by_found = await _rank(), {}
 
-    top_candidate_rows = []
-    for m in matches:
-        for c in candidates:
-            if int(c["id"]) == int(m.other_id):
-                top_candidate_rows.append(c)
-                break
+    ask_question = not is_closed and needs_clarification(matches)
+
+    cand_by_id = {int(c["id"]): c for c in candidates}
+    top_candidate_rows = [cand_by_id[int(m.other_id)] for m in matches if int(m.other_id) in cand_by_id]
 
     question = None
     if ask_question and not r.get("clarify_key"):
@@ -383,20 +561,28 @@ def view_report(request: Request, report_id: int):
             question = {"key": q[0], "text": q[1]}
 
     approved_info = {}
-    if r["kind"] == "lost":
-        for m in matches:
-            approved = get_approved_claim(int(r["id"]), int(m.other_id))
-            if approved:
-                found_rep = get_report(int(m.other_id))
-                if found_rep:
-                    approved_info[int(m.other_id)] = {
-                        "handover_location": found_rep.get("handover_location") or "",
-                        "contact_info": found_rep.get("contact_info") or "",
-                        "found_is_closed": int(found_rep.get("is_closed") or 0),
-                        "claim_id": approved["id"],
-                    }
-
-    return templates.TemplateResponse(
+    if approved_by_found:
+        # open: the approved claims among the matches; closed: all of them
+        if is_closed:
+            approved_ids = list(approved_by_found)
+        else:
+            approved_ids = [int(m.other_id) for m in matches if int(m.other_id) in approved_by_found]
+        # matched found reports are normally already in hand as candidates
+        found_reps = {i: cand_by_id[i] for i in approved_ids if i in cand_by_id}
+        missing = [i for i in approved_ids if i not in found_reps]
+        if missing:
+            found_reps.update(await run_in_threadpool(get_reports_bulk, missing))
+        for found_id in approved_ids:
+            found_rep = found_reps.get(found_id)
+            if found_rep:
+                approved_info[found_id] = {
+                    "handover_location": found_rep.get("handover_location") or "",
+                    "contact_info": found_rep.get("contact_info") or "",
+                    "found_is_closed": int(found_rep.get("is_closed") or 0),
+                    "claim_id": approved_by_found[found_id]["id"],
+                }
+
+    return conditional(request, templates.TemplateResponse(
         "report.html",
         {
             "request": request,
@@ -411,48 +597,52 @@ def view_report(request: Request, report_id: int):
             "created": created,
             "approved_info": approved_info,
         },
-    )
+    ))
+
+
+def save_clarification(report_id: int, extracted_json: str, key: str, answer: str) -> None:
+    with transaction() as con:
+        update_extracted_json(report_id, extracted_json, con=con)
+        set_clarification(report_id, key, answer, con=con)
 
 
 @app.post("/answer/{report_id}")
-def answer(
+async def answer(
     request: Request,
     report_id: int,
     key: str = Form(...),
     answer: str = Form(...),
 ):
-    u = current_user(request)
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    r = get_report(report_id)
+    r = await run_in_threadpool(get_report, report_id)
     if not r:
         return RedirectResponse(url="/", status_code=303)
 
-    ex = loads_extracted(r["extracted_json"])
-    ex = apply_clarification(ex, key, answer)
-    update_extracted_json(report_id, dumps_extracted(ex))
-
-    set_clarification(report_id, key, answer.strip())
+    # apply_clarification copies, so the shared cached dict is safe to pass in
+    ex = apply_clarification(prepare_report(r).ex, key, answer)
+    await run_in_threadpool(save_clarification, report_id, dumps_extracted(ex), key, answer.strip())
     return RedirectResponse(url=f"/report/{report_id}", status_code=303)
 
 
 @app.get("/claim/{lost_id}/{found_id}", response_class=HTMLResponse)
-def claim_page(request: Request, lost_id: int, found_id: int):
-    u = current_user(request)
+async def claim_page(request: Request, lost_id: int, found_id: int):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    lost = get_report(lost_id)
-    found = get_report(found_id)
+    reps = await run_in_threadpool(get_reports_bulk, [lost_id, found_id])
+    lost, found = reps.get(lost_id), reps.get(found_id)
     if not lost or not found:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
     if int(found.get("is_closed") or 0) == 1:
-        return HTMLResponse("This found report is closed. Claims are disabled.", status_code=400)
+        return HTMLResponse(b"This found report is closed. Claims are disabled.", status_code=400)
 
-    if has_settled_claim_for_found(found_id):
-        return HTMLResponse("This found report is already settled. Claims are disabled.", status_code=400)
+    if await run_in_threadpool(has_settled_claim_for_found, found_id):
+        return HTMLResponse(b"This found report is already settled. Claims are disabled.", status_code=400)
 
     return templates.TemplateResponse(
         "claim.html",
@@ -461,178 +651,153 @@ def claim_page(request: Request, lost_id: int, found_id: int):
 
 
 @app.post("/claim/{lost_id}/{found_id}")
-def claim_submit(
+async def claim_submit(
     request: Request,
     lost_id: int,
     found_id: int,
     proof_text: str = Form(...),
 ):
-    u = current_user(request)
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    found = get_report(found_id)
+    found = await run_in_threadpool(get_report, found_id)
     if not found:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-    if int(found.get("is_closed") or 0) == 1 or has_settled_claim_for_found(found_id):
-        return HTMLResponse("This found report is closed/settled. Claims are disabled.", status_code=400)
+    if int(found.get("is_closed") or 0) == 1 or await run_in_threadpool(has_settled_claim_for_found, found_id):
+        return HTMLResponse(b"This found report is closed/settled. Claims are disabled.", status_code=400)
 
-    create_claim(
+    # the session copy of the user has no phone/nid; the claim snapshot needs the full row
+    claimer = (await run_in_threadpool(get_user_by_id, int(u["id"]))) or u
+    await run_in_threadpool(
+        create_claim,
         lost_id,
         found_id,
         proof_text.strip(),
         claimer_user_id=int(u["id"]),
-        claimer_name=u.get("name") or "",
-        claimer_phone=u.get("phone") or "",
-        claimer_nid=u.get("nid") or "",
+        claimer_name=claimer.get("name") or "",
+        claimer_phone=claimer.get("phone") or "",
+        claimer_nid=claimer.get("nid") or "",
     )
     return RedirectResponse(url=f"/report/{lost_id}", status_code=303)
 
 
 @app.get("/manage/{found_id}", response_class=HTMLResponse)
-def manage_claims(request: Request, found_id: int, token: str):
-    u = current_user(request)
+async def manage_claims(request: Request, found_id: int, token: str):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    found = get_report(found_id)
+    found = await run_in_threadpool(get_report, found_id)
     if not found or not found.get("manage_token") or token != found["manage_token"]:
-        return HTMLResponse("Unauthorized", status_code=403)
+        return HTMLResponse(_ERR_UNAUTHORIZED, status_code=403)
 
-    claims = list_claims_for_found(found_id)
-    lost_reports = {c["lost_report_id"]: get_report(c["lost_report_id"]) for c in claims}
+    claims = await run_in_threadpool(list_claims_for_found_with_lost, found_id)
 
-    return templates.TemplateResponse(
+    return conditional(request, templates.TemplateResponse(
         "claims.html",
         {
             "request": request,
             "user": u,
             "found": found,
             "claims": claims,
-            "lost_reports": lost_reports,
             "token": token,
         },
-    )
+    ))
 
 
 @app.post("/manage/claim/{claim_id}/approve")
-def approve_claim(request: Request, claim_id: int, token: str = Form(...)):
-    u = current_user(request)
+async def approve_claim(request: Request, claim_id: int, token: str = Form(...)):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    claim = get_claim(claim_id)
+    claim = await run_in_threadpool(get_claim_with_found, claim_id)
     if not claim:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-    found = get_report(claim["found_report_id"])
-    if not found or token != found.get("manage_token"):
-        return HTMLResponse("Unauthorized", status_code=403)
+    if token != claim.get("found_manage_token"):
+        return HTMLResponse(_ERR_UNAUTHORIZED, status_code=403)
 
-    if int(found.get("is_closed") or 0) == 1:
-        return HTMLResponse("This report is closed.", status_code=400)
+    if int(claim.get("found_is_closed") or 0) == 1:
+        return HTMLResponse(b"This report is closed.", status_code=400)
 
-    set_claim_status(claim_id, "approved")
-    return RedirectResponse(url=f"/manage/{found['id']}?token={token}", status_code=303)
+    await run_in_threadpool(set_claim_status, claim_id, "approved")
+    return RedirectResponse(url=f"/manage/{claim['found_report_id']}?token={token}", status_code=303)
 
 
 @app.post("/manage/claim/{claim_id}/reject")
-def reject_claim(request: Request, claim_id: int, token: str = Form(...)):
-    u = current_user(request)
+async def reject_claim(request: Request, claim_id: int, token: str = Form(...)):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    claim = get_claim(claim_id)
+    claim = await run_in_threadpool(get_claim_with_found, claim_id)
     if not claim:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-    found = get_report(claim["found_report_id"])
-    if not found or token != found.get("manage_token"):
-        return HTMLResponse("Unauthorized", status_code=403)
+    if token != claim.get("found_manage_token"):
+        return HTMLResponse(_ERR_UNAUTHORIZED, status_code=403)
 
-    set_claim_status(claim_id, "rejected")
-    return RedirectResponse(url=f"/manage/{found['id']}?token={token}", status_code=303)
+    await run_in_threadpool(set_claim_status, claim_id, "rejected")
+    return RedirectResponse(url=f"/manage/{claim['found_report_id']}?token={token}", status_code=303)
 
 
 @app.post("/manage/claim/{claim_id}/settle")
-def settle_claim_route(request: Request, claim_id: int, token: str = Form(...)):
-    u = current_user(request)
+async def settle_claim_route(request: Request, claim_id: int, token: str = Form(...)):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    claim = get_claim(claim_id)
+    claim = await run_in_threadpool(get_claim_with_found, claim_id)
     if not claim:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-    found = get_report(claim["found_report_id"])
-    if not found or token != found.get("manage_token"):
-        return HTMLResponse("Unauthorized", status_code=403)
+    if token != claim.get("found_manage_token"):
+        return HTMLResponse(_ERR_UNAUTHORIZED, status_code=403)
 
     if claim.get("status") != "approved":
-        return HTMLResponse("Only approved claims can be settled.", status_code=400)
+        return HTMLResponse(b"Only approved claims can be settled.", status_code=400)
 
-    settle_claim(claim_id)
-    close_report(int(claim["found_report_id"]), closed_claim_id=claim_id)
-    close_report(int(claim["lost_report_id"]), closed_claim_id=claim_id)
+    await run_in_threadpool(settle_claim_and_close_reports, claim_id)
 
-    return RedirectResponse(url=f"/manage/{found['id']}?token={token}", status_code=303)
+    return RedirectResponse(url=f"/manage/{claim['found_report_id']}?token={token}", status_code=303)
 
 
 @app.post("/dispute/{claim_id}")
-def dispute_claim(request: Request, claim_id: int, reason: str = Form(...)):
-    u = current_user(request)
+async def dispute_claim(request: Request, claim_id: int, reason: str = Form(...)):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
-    claim = get_claim(claim_id)
+    claim = await run_in_threadpool(get_claim, claim_id)
     if not claim:
-        return HTMLResponse("Not found", status_code=404)
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-    create_dispute(claim_id, reason.strip(), reporter_user_id=int(u["id"]))
+    await run_in_threadpool(create_dispute, claim_id, reason.strip(), reporter_user_id=int(u["id"]))
     return RedirectResponse(url=f"/report/{claim['lost_report_id']}", status_code=303)
 
 
 @app.get("/office/claim/{claim_id}", response_class=HTMLResponse)
-def office_view_claim(request: Request, claim_id: int):
-    u = current_user(request)
+async def office_view_claim(request: Request, claim_id: int):
+    u = await run_in_threadpool(current_user, request)
     if not u:
         return require_login_redirect(request)
 
     if not require_office(u):
-        return HTMLResponse("Unauthorized", status_code=403)
+        return HTMLResponse(_ERR_UNAUTHORIZED, status_code=403)
 
-    claim = get_claim(claim_id)
+    claim, disputes = await asyncio.gather(
+        run_in_threadpool(get_claim_with_titles, claim_id),
+        run_in_threadpool(list_disputes_for_claim, claim_id),
+    )
     if not claim:
-        return HTMLResponse("Not found", status_code=404)
-
-    disputes = list_disputes_for_claim(claim_id)
-
-    html = f"""
-    <html><head><meta charset="utf-8"><title>Office Claim #{claim_id}</title></head>
-    <body style="font-family:system-ui; padding:16px;">
-      <h1>Office view: Claim #{claim_id}</h1>
-
-      <p><a href="/">Home</a> | <a href="/me">My Dashboard</a> |
-      <form style="display:inline" method="post" action="/logout"><button type="submit">Logout</button></form></p>
+        return HTMLResponse(_ERR_NOT_FOUND, status_code=404)
 
-      <h2>Status</h2>
-      <p><b>Status:</b> {claim.get('status')} &nbsp; <b>Settled:</b> {int(claim.get('is_settled') or 0)}</p>
-
-      <h2>Links</h2>
-      <p><b>Lost:</b> <a href="/report/{claim['lost_report_id']}">Report #{claim['lost_report_id']}</a></p>
-      <p><b>Found:</b> <a href="/report/{claim['found_report_id']}">Report #{claim['found_report_id']}</a></p>
-
-      <h2>Claimant details (office only)</h2>
-      <p><b>Name:</b> {claim.get('claimer_name') or ''}</p>
-      <p><b>Phone:</b> {claim.get('claimer_phone') or ''}</p>
-      <p><b>NID:</b> {claim.get('claimer_nid') or ''}</p>
-
-      <h2>Proof text</h2>
-      <pre style="white-space:pre-wrap; border:1px solid #ddd; padding:12px;">{claim.get('proof_text') or ''}</pre>
-
-      <h2>Disputes</h2>
-      {"".join([f"<div style='border:1px solid #ddd; padding:10px; margin:8px 0;'><b>#{d['id']}</b> {d['created_at']}<br><b>Reporter user_id:</b> {d.get('reporter_user_id')}<br>{d['reason']}</div>" for d in disputes]) or "<p>No disputes.</p>"}
-    </body></html>
-    """
-    return HTMLResponse(html)
+    # templates/office_claim.html: autoescaped (proof text / dispute reasons are
+    # user input) and compiled once, unlike the inline f-string page it replaces
+    return templates.TemplateResponse(
+        "office_claim.html",
+        {"request": request, "user": u, "claim": claim, "disputes": disputes},
+    )
@@ -1,9 +1,10 @@
 # app/matching.py
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass
-from typing import Dict, Any, List, Tuple, Optional
-from datetime import datetime
+from typing import AbstractSet, Dict, Any, List, Tuple, Optional
+from datetime import datetime, timezone
 
 # Optional: sklearn TF-IDF retrieval (nice to have, but should NOT crash if missing)
 try:
@@ -25,11 +26,15 @@ class MatchResult:
     reasons: List[str]
 
 
-def jaccard(a: set[str], b: set[str]) -> float:
-    if not a and not b:
+def jaccard(a: AbstractSet[str], b: AbstractSet[str]) -> float:
+    if not a or not b:
         return 0.0
-    inter = len(a.intersection(b))
-    union = len(a.union(b))
+    if a is b:
+        # same cached set (e.g. a report compared with itself)
+        return 1.0
+    inter = len(a & b)
+    # |a ∪ b| without building the union set
+    union = len(a) + len(b) - inter
     return inter / union if union else 0.0
 
 
@@ -42,119 +47,211 @@ def parse_iso(dt: Optional[str]) -> Optional[datetime]:
         return None
 
 
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _epoch_seconds(dt: Optional[str]) -> Optional[float]:
+    """parse_iso(dt) as seconds since 1970 (naive times are taken as UTC wall clock)."""
+    t = parse_iso(dt)
+    if t is None:
+        return None
+    return (t - (_EPOCH_NAIVE if t.tzinfo is None else _EPOCH_UTC)).total_seconds()
+
+
 def time_plausibility(lost_time: Optional[str], found_time: Optional[str]) -> Tuple[float, Optional[str]]:
     """
     Returns (score, reason)
     - Prefer found AFTER lost, within a few days.
     """
-    lt = parse_iso(lost_time)
-    ft = parse_iso(found_time)
-    if not lt or not ft:
+    lt = _epoch_seconds(lost_time)
+    ft = _epoch_seconds(found_time)
+    if lt is None or ft is None:
         return 0.0, None
+    return _time_score((ft - lt) / 3600.0)
+
 
-    delta_hours = (ft - lt).total_seconds() / 3600.0
+def _time_score(delta_hours: float, explain: bool = True) -> Tuple[float, Optional[str]]:
+    """time_plausibility on an already computed found-minus-lost gap (hours)."""
     if delta_hours < -1:
-        return -0.15, "Time seems inconsistent (found before lost)."
+        return -0.15, ("Time seems inconsistent (found before lost)." if explain else None)
     if 0 <= delta_hours <= 72:
-        return 0.15, f"Time plausible: found ~{delta_hours:.1f}h after lost."
+        return 0.15, (f"Time plausible: found ~{delta_hours:.1f}h after lost." if explain else None)
     if 72 < delta_hours <= 240:
-        return 0.05, f"Time plausible but wide gap (~{delta_hours/24:.1f} days)."
+        return 0.05, (f"Time plausible but wide gap (~{delta_hours/24:.1f} days)." if explain else None)
     return 0.0, None
 
 
-def compute_match(a: Dict[str, Any], b: Dict[str, Any]) -> MatchResult:
+@dataclass
+class _Prepared:
+    """Per-report features compute_match needs, built once instead of per pair."""
+    text_tokens: frozenset[str]
+    loc_tokens: frozenset[str]
+    ex: Dict[str, Any]
+    colors: frozenset[str]
+    identifiers: frozenset[str]
+    event_ts: Optional[float]  # event_time as epoch seconds (None if missing/unparseable)
+    # text tokens + identifier hashes: two reports sharing none of these can't score
+    # above _MAX_SCORE_WITHOUT_OVERLAP (see find_duplicate)
+    overlap_keys: frozenset[str]
+
+
+# report id -> (content signature, features). Entries rebuild themselves when the row's
+# text or extracted_json changes, so writers don't have to invalidate anything.
+# Unsaved rows (id None / -1, e.g. the report being submitted) share one slot per id:
+# enough to prepare the "current" side once per ranking instead of once per candidate.
+_PREPARED_CACHE: Dict[Optional[int], Tuple[tuple, _Prepared]] = {}
+_PREPARED_CACHE_MAX = 4096
+
+
+def _prepare_uncached(r: Dict[str, Any]) -> _Prepared:
+    ex = loads_extracted(r.get("extracted_json") or "{}")
+    # tokenize works word by word, so tokens of "title description location" are just
+    # the parts' tokens together: tokenize the location once and reuse it
+    loc_tokens = frozenset(tokenize(r.get("location_text", "")))
+    text_tokens = frozenset(tokenize(f"{r.get('title','')} {r.get('description','')}")) | loc_tokens
+    identifiers = frozenset(ex.get("identifiers") or [])
+    return _Prepared(
+        text_tokens=text_tokens,
+        loc_tokens=loc_tokens,
+        ex=ex,
+        colors=frozenset(ex.get("colors") or []),
+        identifiers=identifiers,
+        event_ts=_epoch_seconds(r.get("event_time")),
+        overlap_keys=text_tokens | identifiers,
+    )
+
+
+def prepare_report(r: Dict[str, Any]) -> _Prepared:
     """
-    a = current report row dict
-    b = candidate opposite report row dict
+    Returns the cached features for a report row.
+    The returned features are shared: treat them as read-only.
     """
-    a_text = f"{a.get('title','')} {a.get('description','')} {a.get('location_text','')}"
-    b_text = f"{b.get('title','')} {b.get('description','')} {b.get('location_text','')}"
+    rid = r.get("id")
+    rid = int(rid) if rid is not None else None
 
-    a_tokens = set(tokenize(a_text))
-    b_tokens = set(tokenize(b_text))
+    sig = (r.get("title"), r.get("description"), r.get("location_text"), r.get("extracted_json"), r.get("event_time"))
+    hit = _PREPARED_CACHE.get(rid)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
 
-    text_sim = jaccard(a_tokens, b_tokens)
+    p = _prepare_uncached(r)
+    if len(_PREPARED_CACHE) >= _PREPARED_CACHE_MAX:
+        _PREPARED_CACHE.clear()
+    _PREPARED_CACHE[rid] = (sig, p)
+    return p
 
-    a_ex = loads_extracted(a.get("extracted_json") or "{}")
-    b_ex = loads_extracted(b.get("extracted_json") or "{}")
 
-    reasons: List[str] = []
+def _score(a: Dict[str, Any], b: Dict[str, Any], reasons: Optional[List[str]] = None) -> float:
+    """
+    compute_match's scoring. Human-readable reasons are only built when a list is
+    passed in; the duplicate check and other score-only callers skip all that formatting.
+    """
+    pa = prepare_report(a)
+    pb = prepare_report(b)
+    explain = reasons is not None
+
+    text_sim = jaccard(pa.text_tokens, pb.text_tokens)
+
+    a_ex = pa.ex
+    b_ex = pb.ex
+
     score = 0.0
 
     # Weighted parts
     score += 0.55 * text_sim
-    if text_sim > 0.15:
+    if explain and text_sim > 0.15:
         reasons.append(f"Text overlap looks similar (Jaccard {text_sim:.2f}).")
 
     # item type
     if a_ex.get("item_type") and b_ex.get("item_type"):
         if a_ex["item_type"] == b_ex["item_type"]:
             score += 0.20
-            reasons.append(f"Item type matches: {a_ex['item_type']}.")
+            if explain:
+                reasons.append(f"Item type matches: {a_ex['item_type']}.")
         else:
             score -= 0.05
-            reasons.append(f"Item type differs ({a_ex['item_type']} vs {b_ex['item_type']}).")
+            if explain:
+                reasons.append(f"Item type differs ({a_ex['item_type']} vs {b_ex['item_type']}).")
 
     # colors
-    a_colors = set(a_ex.get("colors") or [])
-    b_colors = set(b_ex.get("colors") or [])
+    a_colors = pa.colors
+    b_colors = pb.colors
     if a_colors and b_colors:
         overlap = a_colors.intersection(b_colors)
         if overlap:
             score += 0.12
-            reasons.append(f"Color overlap: {', '.join(sorted(overlap))}.")
+            if explain:
+                reasons.append(f"Color overlap: {', '.join(sorted(overlap))}.")
         else:
             score -= 0.03
-            reasons.append("Colors don’t overlap.")
+            if explain:
+                reasons.append("Colors don’t overlap.")
 
     # brand
     if a_ex.get("brand") and b_ex.get("brand"):
         if a_ex["brand"] == b_ex["brand"]:
             score += 0.12
-            reasons.append(f"Brand matches: {a_ex['brand']}.")
+            if explain:
+                reasons.append(f"Brand matches: {a_ex['brand']}.")
         else:
             score -= 0.02
 
     # location token overlap (cheap)
-    a_loc = set(tokenize(a.get("location_text", "")))
-    b_loc = set(tokenize(b.get("location_text", "")))
-    loc_sim = jaccard(a_loc, b_loc)
+    loc_sim = jaccard(pa.loc_tokens, pb.loc_tokens)
     score += 0.10 * loc_sim
-    if loc_sim > 0.20:
+    if explain and loc_sim > 0.20:
         reasons.append(f"Location text seems close (Jaccard {loc_sim:.2f}).")
 
-    # time plausibility (lost vs found)
-    if a.get("kind") == "lost":
-        tscore, treason = time_plausibility(a.get("event_time"), b.get("event_time"))
-    else:
-        tscore, treason = time_plausibility(b.get("event_time"), a.get("event_time"))
-    score += tscore
-    if treason:
-        reasons.append(treason)
+    # time plausibility (lost vs found), on pre-parsed timestamps
+    if pa.event_ts is not None and pb.event_ts is not None:
+        if a.get("kind") == "lost":
+            delta_hours = (pb.event_ts - pa.event_ts) / 3600.0
+        else:
+            delta_hours = (pa.event_ts - pb.event_ts) / 3600.0
+        tscore, treason = _time_score(delta_hours, explain)
+        score += tscore
+        if treason:
+            reasons.append(treason)
 
     # identifier hashes overlap (privacy-safe)
-    a_ids = set(a_ex.get("identifiers") or [])
-    b_ids = set(b_ex.get("identifiers") or [])
-    if a_ids and b_ids and a_ids.intersection(b_ids):
+    a_ids = pa.identifiers
+    b_ids = pb.identifiers
+    if a_ids and b_ids and not a_ids.isdisjoint(b_ids):
         score += 0.35
-        reasons.append("Hidden identifier signal matches (not displayed).")
+        if explain:
+            reasons.append("Hidden identifier signal matches (not displayed).")
 
     # clamp-ish
-    score = max(-0.5, min(1.5, score))
+    return float(max(-0.5, min(1.5, score)))
+
+
+def compute_match(a: Dict[str, Any], b: Dict[str, Any]) -> MatchResult:
+    """
+    a = current report row dict
+    b = candidate opposite report row dict
+    """
+    reasons: List[str] = []
+    score = _score(a, b, reasons)
+    return MatchResult(other_id=int(b["id"]), score=score, reasons=reasons)
+
 
-    return MatchResult(other_id=int(b["id"]), score=float(score), reasons=reasons)
+def match_scores(current: Dict[str, Any], candidates: List[Dict[str, Any]]) -> List[float]:
+    """compute_match(current, c).score for every candidate, without building reasons."""
+    return [_score(current, c) for c in candidates]
 
 
 def retrieve_candidates_tfidf(current: Dict[str, Any], candidates: List[Dict[str, Any]], top_n: int = 200) -> List[Dict[str, Any]]:
     """
     If sklearn is available, use TF-IDF to shortlist candidates.
     Otherwise, return a simple slice so the app still runs everywhere.
+    If all candidates fit in top_n there is nothing to drop: they come back as given.
     """
-    if not candidates:
-        return []
+    if len(candidates) <= top_n:
+        return candidates
 
     if not _HAS_SKLEARN:
-        return candidates[: min(top_n, len(candidates))]
+        return candidates[:top_n]
 
     cur_text = f"{current.get('title','')} {current.get('description','')} {current.get('location_text','')}"
     cand_texts = [f"{c.get('title','')} {c.get('description','')} {c.get('location_text','')}" for c in candidates]
@@ -163,15 +260,57 @@ def retrieve_candidates_tfidf(current: Dict[str, Any], candidates: List[Dict[str
     X = vectorizer.fit_transform([cur_text] + cand_texts)
     sims = cosine_similarity(X[0:1], X[1:]).flatten()
 
-    idx = sims.argsort()[::-1][: min(top_n, len(candidates))]
+    idx = sims.argsort()[::-1][:top_n]
     return [candidates[i] for i in idx]
 
 
 def rank_matches(current: Dict[str, Any], candidates: List[Dict[str, Any]], k: int = 5) -> List[MatchResult]:
     short = retrieve_candidates_tfidf(current, candidates, top_n=200)
-    scored = [compute_match(current, c) for c in short]
-    scored.sort(key=lambda m: m.score, reverse=True)
-    return scored[:k]
+    # rank on bare scores; build reasons only for the k that are returned
+    scores = match_scores(current, short)
+    # k best without sorting them all; same order as sorted(..., reverse=True)[:k]
+    order = heapq.nlargest(k, range(len(short)), key=scores.__getitem__)
+    return [compute_match(current, short[i]) for i in order]
+
+
+# Ask a clarifying question unless the best match is confident and clearly ahead.
+CLARIFY_MIN_SCORE = 0.55
+CLARIFY_MIN_GAP = 0.08
+
+
+def needs_clarification(matches: List[MatchResult]) -> bool:
+    """matches: ranked best-first (as returned by rank_matches)."""
+    if not matches:
+        return True
+    top = matches[0].score
+    return top < CLARIFY_MIN_SCORE or (len(matches) > 1 and top - matches[1].score < CLARIFY_MIN_GAP)
+
+
+DUPLICATE_THRESHOLD = 0.85
+
+# Best _score possible with no shared text token (so loc_sim = 0 too, location is part
+# of the text) and no shared identifier: item type + colors + brand + time.
+_MAX_SCORE_WITHOUT_OVERLAP = 0.20 + 0.12 + 0.12 + 0.15
+
+
+def find_duplicate(current: Dict[str, Any], candidates: List[Dict[str, Any]], threshold: float = DUPLICATE_THRESHOLD) -> Optional[int]:
+    """
+    Returns the id of the same-kind candidate that compute_match scores highest, if
+    that score reaches `threshold` (a likely duplicate), else None.
+    Candidates sharing no token/identifier with `current` are dropped first with one
+    set check each: they can't reach a threshold above _MAX_SCORE_WITHOUT_OVERLAP.
+    """
+    if candidates and threshold > _MAX_SCORE_WITHOUT_OVERLAP:
+        keys = prepare_report(current).overlap_keys
+        candidates = [c for c in candidates if not keys.isdisjoint(prepare_report(c).overlap_keys)]
+    if not candidates:
+        return None
+
+    scores = match_scores(current, candidates)
+    best = max(range(len(scores)), key=scores.__getitem__)  # first of equal maxima
+    if scores[best] >= threshold:
+        return int(candidates[best]["id"])
+    return None
 
 
 def choose_clarifying_question(current: Dict[str, Any], top_candidates: List[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
@@ -179,7 +318,7 @@ def choose_clarifying_question(current: Dict[str, Any], top_candidates: List[Dic
     Pick ONE question that best separates the top candidates, preferring fields missing in current report.
     Returns (key, question_text) or None.
     """
-    cur_ex = loads_extracted(current.get("extracted_json") or "{}")
+    cur_ex = prepare_report(current).ex
 
     fields = [
         ("brand", "What brand is it? (e.g., Samsung, Apple, Xiaomi)"),
@@ -199,8 +338,7 @@ def choose_clarifying_question(current: Dict[str, Any], top_candidates: List[Dic
     for key, question in fields:
         values = set()
         for c in top_candidates:
-            ex = loads_extracted(c.get("extracted_json") or "{}")
-            v = ex.get(key)
+            v = prepare_report(c).ex.get(key)
             if isinstance(v, list):
                 v = tuple(v)
             if v:
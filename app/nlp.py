@@ -4,7 +4,16 @@ from __future__ import annotations
 import hashlib
 import json
 import re
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+# Optional: orjson (C JSON codec) for extracted_json; stdlib json otherwise
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    orjson = None
+    _HAS_ORJSON = False
 
 
 # -----------------------------
@@ -12,7 +21,7 @@ from typing import Dict, Any, List, Optional
 # -----------------------------
 
 # Canonical base colors (lowercase)
-BASE_COLORS = {
+BASE_COLORS = frozenset({
     "black", "white", "gray", "red", "blue", "green", "yellow", "orange",
     "pink", "purple", "brown",
     "silver", "gold", "navy", "maroon",
@@ -23,7 +32,7 @@ BASE_COLORS = {
     "burgundy", "peach", "mustard",
     "bronze", "copper",
     "charcoal",
-}
+})
 
 # Aliases -> canonical
 COLOR_ALIASES = {
@@ -73,13 +82,11 @@ SPECIAL_COLOR_PHRASES = {
 
 
 def _canon_color(s: str) -> str:
-    s = s.strip().lower()
-    if s in COLOR_ALIASES:
-        return COLOR_ALIASES[s]
-    return s
+    # callers pass tokens / normalized text, which are already lowercase and trimmed
+    return COLOR_ALIASES.get(s, s)
 
 
-def extract_colors(text: str, tokens: List[str], norm: str) -> List[str]:
+def extract_colors(tokens: List[str], norm: str) -> List[str]:
     colors: set[str] = set()
 
     # Special phrases
@@ -310,21 +317,15 @@ for _canon, _syns in ITEM_SYNONYMS.items():
         TOKEN_CANONICAL_MAP[_t] = _canon
 
 
-def infer_item_type(text: str, tokens: List[str], norm: str) -> Optional[str]:
-    token_set = set(tokens)
-    scores: Dict[str, int] = {k: 0 for k in ITEM_SYNONYMS.keys()}
-
-    for itype, phrases in ITEM_PHRASES.items():
-        for p in phrases:
-            if p in norm:
-                scores[itype] = scores.get(itype, 0) + 3
-
-    for itype, syns in ITEM_SYNONYMS.items():
-        scores[itype] = scores.get(itype, 0) + len(token_set.intersection(syns))
+# synonym token -> item types listing it (a token may belong to more than one)
+_ITEM_TYPES_BY_TOKEN: Dict[str, Tuple[str, ...]] = {}
+for _itype, _syns in ITEM_SYNONYMS.items():
+    for _t in _syns:
+        _ITEM_TYPES_BY_TOKEN[_t] = (*_ITEM_TYPES_BY_TOKEN.get(_t, ()), _itype)
 
-    best_type = None
-    best_score = 0
-    preference = [
+# tie-break between equally scored item types (lower wins)
+_ITEM_TYPE_PREFERENCE = {
+    k: i for i, k in enumerate([
         "documents",
         "card",
         "wallet",
@@ -349,8 +350,26 @@ def infer_item_type(text: str, tokens: List[str], norm: str) -> Optional[str]:
         "calculator",
         "bag",
         "clothing",
-    ]
-    pref_rank = {k: i for i, k in enumerate(preference)}
+    ])
+}
+
+
+def infer_item_type(tokens: List[str], norm: str) -> Optional[str]:
+    scores: Dict[str, int] = {k: 0 for k in ITEM_SYNONYMS.keys()}
+
+    for itype, phrases in ITEM_PHRASES.items():
+        for p in phrases:
+            if p in norm:
+                scores[itype] = scores.get(itype, 0) + 3
+
+    # one lookup per distinct token instead of intersecting with every synonym set
+    for t in set(tokens):
+        for itype in _ITEM_TYPES_BY_TOKEN.get(t, ()):
+            scores[itype] += 1
+
+    best_type = None
+    best_score = 0
+    pref_rank = _ITEM_TYPE_PREFERENCE
 
     for itype, sc in scores.items():
         if sc > best_score:
@@ -367,14 +386,14 @@ def infer_item_type(text: str, tokens: List[str], norm: str) -> Optional[str]:
 # Tokenization / normalization
 # -----------------------------
 
-STOPWORDS = {
+STOPWORDS = frozenset({
     "a", "an", "the", "and", "or", "but", "with", "without", "near", "at", "in", "on", "to", "from",
     "of", "for", "my", "our", "your", "is", "was", "were", "it", "this", "that", "i", "we", "they",
     "yesterday", "today", "tomorrow", "evening", "morning", "night",
     "lost", "found", "missing", "pickup", "pick", "picked", "drop", "dropped",
-}
+})
 
-COMMON_BRANDS = {
+COMMON_BRANDS = frozenset({
     "apple", "iphone", "ipad",
     "samsung", "xiaomi", "redmi", "poco", "oneplus", "oppo", "vivo", "huawei",
     "google", "pixel", "nokia", "realme", "motorola", "infinix", "tecno", "itel",
@@ -383,53 +402,83 @@ COMMON_BRANDS = {
     "anker", "soundcore", "baseus", "ugreen", "aukey", "romoss",
     "boat", "edifier",
     "casio", "fossil", "garmin",
-}
+})
+
+
+class _SpaceOutDisallowed(dict):
+    """
+    str.translate table: a-z, 0-9 and "-" stay, every other character becomes a space.
+    Latin-1 is precomputed; anything above it is disallowed and answered by __missing__
+    without being stored, so untrusted input cannot grow the table.
+    """
+
+    def __missing__(self, cp: int) -> int:
+        return 32
+
+
+_ALLOWED_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789-")
+_NORMALIZE_TABLE = _SpaceOutDisallowed(
+    (cp, cp if chr(cp) in _ALLOWED_CHARS else 32) for cp in range(256)
+)
+
+
+# The same text is normalized and tokenized several times per request (extract,
+# extract_identifiers, the duplicate check, the FTS prefilter), so both are memoized
+# on the input string. Only short inputs (titles, short descriptions) go through the
+# caches: long free text would pin up to 1024 large strings for little gain.
+_MEMO_MAX_LEN = 512
 
 
 def normalize_text(s: str) -> str:
-    s = (s or "").lower().strip()
-    s = re.sub(r"[\r\n\t]+", " ", s)
-    s = re.sub(r"[^a-z0-9\s\-]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    if s and len(s) <= _MEMO_MAX_LEN:
+        return _normalize_text_cached(s)
+    return _normalize_text(s)
+
+
+def _normalize_text(s: str) -> str:
+    # any run of characters outside [a-z0-9-] becomes ONE space, ends trimmed:
+    # translate + split/join does that about twice as fast as re.sub
+    return " ".join((s or "").lower().translate(_NORMALIZE_TABLE).split())
+
+
+_normalize_text_cached = lru_cache(maxsize=1024)(_normalize_text)
 
 
 def tokenize(s: str) -> List[str]:
-    s = normalize_text(s)
-    raw = [t for t in s.split(" ") if t]
-    out: List[str] = []
-    for t in raw:
-        for part in t.split("-"):
-            part = part.strip()
-            if not part:
-                continue
-            if part in STOPWORDS:
-                continue
-            out.append(part)
-    return out
+    # a fresh list every call: callers may append to it
+    if s and len(s) <= _MEMO_MAX_LEN:
+        return list(_tokenize_cached(s))
+    return list(_tokenize(s))
+
+
+def _tokenize(s: str) -> Tuple[str, ...]:
+    # normalized text only has single spaces and "-" as separators
+    return tuple(t for t in normalize_text(s).replace("-", " ").split() if t not in STOPWORDS)
+
+
+_tokenize_cached = lru_cache(maxsize=1024)(_tokenize)
 
 
 def expand_tokens(tokens: List[str]) -> List[str]:
-    expanded = list(tokens)
+    """
+    The tokens (deduplicated, in order), then the canonical item/color forms they
+    add. A dict is the ordered set: one hash lookup per check instead of list scans.
+    Tokens come from tokenize (already lowercase), so aliases are looked up directly.
+    """
+    expanded = dict.fromkeys(tokens)
     for t in tokens:
         canon = TOKEN_CANONICAL_MAP.get(t)
-        if canon and canon not in expanded:
-            expanded.append(canon)
+        if canon:
+            expanded.setdefault(canon)
 
-        ct = _canon_color(t)
-        if ct != t and ct not in expanded:
-            expanded.append(ct)
+        ct = COLOR_ALIASES.get(t)
+        if ct:
+            expanded.setdefault(ct)
 
-    if "see" in tokens and "through" in tokens and "transparent" not in expanded:
-        expanded.append("transparent")
+    if "see" in expanded and "through" in expanded:
+        expanded.setdefault("transparent")
 
-    seen = set()
-    uniq: List[str] = []
-    for t in expanded:
-        if t not in seen:
-            seen.add(t)
-            uniq.append(t)
-    return uniq
+    return list(expanded)
 
 
 # -----------------------------
@@ -437,19 +486,27 @@ def expand_tokens(tokens: List[str]) -> List[str]:
 # -----------------------------
 
 def dumps_extracted(obj: Dict[str, Any]) -> str:
+    if _HAS_ORJSON:
+        # UTF-8 like ensure_ascii=False, just without the spaces after separators
+        return orjson.dumps(obj).decode()
     return json.dumps(obj, ensure_ascii=False)
 
 
 def loads_extracted(s: str) -> Dict[str, Any]:
     try:
-        return json.loads(s)
+        return orjson.loads(s) if _HAS_ORJSON else json.loads(s)
     except Exception:
         return {}
 
 
+# sha256 state with the "LFv1:" prefix already absorbed; each id hash copies it
+_HASH_ID_PREFIX = hashlib.sha256(b"LFv1:")
+
+
 def _hash_id(value: str) -> str:
-    h = hashlib.sha256(("LFv1:" + value).encode("utf-8")).hexdigest()
-    return h[:16]
+    h = _HASH_ID_PREFIX.copy()
+    h.update(value.encode("utf-8"))
+    return h.hexdigest()[:16]
 
 
 EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+\-]+@[\w.\-]+\.[A-Za-z]{2,}\b")
@@ -474,27 +531,36 @@ def extract_identifiers(text: str) -> List[str]:
     return sorted({_hash_id(x) for x in ids})
 
 
-def mask_sensitive(text: str) -> str:
-    text = text or ""
+_ANY_DIGIT_RE = re.compile(r"\d")
+_NON_DIGITS_RE = re.compile(r"\D+")
 
-    def _mask_email(m):
-        s = m.group(0)
-        user, domain = s.split("@", 1)
-        if len(user) <= 2:
-            mu = "*" * len(user)
-        else:
-            mu = user[:1] + "*" * (len(user) - 2) + user[-1:]
-        return mu + "@" + domain
 
-    text = EMAIL_RE.sub(_mask_email, text)
+def _mask_email(m: re.Match) -> str:
+    s = m.group(0)
+    user, domain = s.split("@", 1)
+    if len(user) <= 2:
+        mu = "*" * len(user)
+    else:
+        mu = user[:1] + "*" * (len(user) - 2) + user[-1:]
+    return mu + "@" + domain
 
-    def _mask_phone(m):
-        s = m.group(0)
-        digits = re.sub(r"\D+", "", s)
-        if len(digits) <= 2:
-            return "*" * len(digits)
-        return ("*" * (len(digits) - 2)) + digits[-2:]
 
+def _mask_phone(m: re.Match) -> str:
+    digits = _NON_DIGITS_RE.sub("", m.group(0))
+    if len(digits) <= 2:
+        return "*" * len(digits)
+    return ("*" * (len(digits) - 2)) + digits[-2:]
+
+
+def mask_sensitive(text: str) -> str:
+    text = text or ""
+    # every pattern below needs an "@" or a digit; most titles/locations have neither
+    has_at = "@" in text
+    if not has_at and not _ANY_DIGIT_RE.search(text):
+        return text
+
+    if has_at:
+        text = EMAIL_RE.sub(_mask_email, text)
     text = BD_PHONE_RE.sub(_mask_phone, text)
     text = LONG_DIGITS_RE.sub("[REDACTED_ID]", text)
     return text
@@ -504,18 +570,21 @@ def mask_sensitive(text: str) -> str:
 # Main extraction
 # -----------------------------
 
+_CONTAINS_RE = re.compile(r"\bcontains\b(.+)$")
+
+
 def extract(report_text: str) -> Dict[str, Any]:
     norm = normalize_text(report_text)
     tokens = tokenize(report_text)
     tokens = expand_tokens(tokens)
 
     identifiers = extract_identifiers(report_text)
-    colors = extract_colors(report_text, tokens, norm)
+    colors = extract_colors(tokens, norm)
 
     brands = sorted({t for t in tokens if t in COMMON_BRANDS})
     brand = brands[0] if brands else None
 
-    item_type = infer_item_type(report_text, tokens, norm)
+    item_type = infer_item_type(tokens, norm)
 
     # ensure canonical type appears as a token (helps matching across wording)
     if item_type and item_type not in tokens:
@@ -537,7 +606,7 @@ def extract(report_text: str) -> Dict[str, Any]:
             unique_marks.append(canon)
 
     contained: List[str] = []
-    m = re.search(r"\bcontains\b(.+)$", norm)
+    m = _CONTAINS_RE.search(norm)
     if m:
         contained = [x.strip() for x in m.group(1).split(",") if x.strip()]
 
@@ -567,10 +636,10 @@ def apply_clarification(extracted: Dict[str, Any], key: str, answer: str) -> Dic
         extracted["brand"] = brands[0] if brands else (ans_tokens[0] if ans_tokens else answer.strip().lower())
 
     elif key == "colors":
-        extracted["colors"] = extract_colors(answer, ans_tokens, norm)
+        extracted["colors"] = extract_colors(ans_tokens, norm)
 
     elif key == "item_type":
-        itype = infer_item_type(answer, ans_tokens, norm)
+        itype = infer_item_type(ans_tokens, norm)
         extracted["item_type"] = itype or (ans_tokens[0] if ans_tokens else None)
 
     elif key == "unique_marks":
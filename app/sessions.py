@@ -0,0 +1,190 @@
+# app/sessions.py
+"""
+Signed-cookie sessions (drop-in for starlette's SessionMiddleware).
+
+Same model as before: the whole session dict lives in the cookie, signed so the
+client can't change it (it is NOT encrypted, so keep secrets out of it).
+The difference is the format: one keyed BLAKE2b over the payload straight from
+hashlib, instead of itsdangerous' TimestampSigner machinery. BLAKE2b's key mode is
+a MAC by itself, so there's no HMAC double hash.
+
+Cookie value: <base64url(json)>.<issued unix time>.<base64url(tag)>
+
+Unlike starlette, the cookie is only re-sent when the session changed, when it was
+signed with an old key, or when it is older than refresh_after (so max_age still
+works as an idle timeout). Most responses carry no Set-Cookie at all.
+
+Key rotation: sign with secret_key, also accept cookies signed with any of
+fallback_secret_keys; those get re-signed with the current key on the next response.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_TAG_BYTES = 16
+
+
+class Session(dict):
+    """The session dict, remembering whether it was changed (top-level writes only)."""
+
+    __slots__ = ("modified",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.modified = False
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.modified = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self.modified = True
+        super().__delitem__(key)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key in self:
+            self.modified = True
+        return super().pop(key, *default)
+
+    def popitem(self) -> Any:
+        self.modified = True
+        return super().popitem()
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.modified = True
+        super().update(*args, **kwargs)
+
+    def __ior__(self, other: Any) -> "Session":
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        self.modified = True
+        super().clear()
+
+
+def _b64e(b: bytes) -> str:
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
+
+
+def _b64d(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+
+class SignedCookieSessionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret_key: str,
+        fallback_secret_keys: Sequence[str] = (),
+        session_cookie: str = "session",
+        max_age: Optional[int] = 14 * 24 * 60 * 60,  # 14 days, in seconds
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        refresh_after: int = 24 * 60 * 60,  # re-issue unchanged cookies this old (seconds)
+    ) -> None:
+        self.app = app
+        self.refresh_after = refresh_after
+        # first key signs; all of them verify
+        self._keys = [
+            hashlib.blake2b(str(k).encode("utf-8"), digest_size=32, person=b"session").digest()
+            for k in (secret_key, *fallback_secret_keys)
+        ]
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    @staticmethod
+    def _tag(key: bytes, signed_part: str) -> str:
+        mac = hashlib.blake2b(signed_part.encode("ascii"), key=key, digest_size=_TAG_BYTES).digest()
+        return _b64e(mac)
+
+    def dumps(self, session: Dict[str, Any]) -> str:
+        payload = _b64e(json.dumps(session, separators=(",", ":")).encode("utf-8"))
+        signed_part = f"{payload}.{int(time.time())}"
+        return f"{signed_part}.{self._tag(self._keys[0], signed_part)}"
+
+    def _load(self, value: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """(session, needs re-issuing) for a valid cookie value, else None."""
+        try:
+            payload, issued, tag = value.split(".")
+            signed_part = f"{payload}.{issued}"
+            for i, key in enumerate(self._keys):
+                if hmac.compare_digest(tag, self._tag(key, signed_part)):
+                    break
+            else:
+                return None
+            age = time.time() - int(issued)
+            if self.max_age and age > self.max_age:
+                return None
+            data = json.loads(_b64d(payload))
+        except Exception:
+            return None
+        if not isinstance(data, dict):
+            return None
+        return data, (i > 0 or age > self.refresh_after)
+
+    def loads(self, value: str) -> Optional[Dict[str, Any]]:
+        """The session stored in a cookie value, or None if it's forged/expired/garbled."""
+        loaded = self._load(value)
+        return loaded[0] if loaded else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        initial_session_was_empty = True
+        reissue = False
+
+        raw = connection.cookies.get(self.session_cookie)
+        loaded = self._load(raw) if raw else None
+        if loaded is not None:
+            data, reissue = loaded
+            initial_session_was_empty = not data
+            scope["session"] = Session(data)
+        else:
+            scope["session"] = Session()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                changed = reissue or getattr(session, "modified", True)
+                if session and changed:
+                    headers = MutableHeaders(scope=message)
+                    max_age = f"Max-Age={self.max_age}; " if self.max_age else ""
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}={self.dumps(session)}; path={self.path}; "
+                        f"{max_age}{self.security_flags}",
+                    )
+                elif not session and not initial_session_was_empty:
+                    # the session was cleared (logout)
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; path={self.path}; "
+                        f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,49 @@
+# app/tokens.py
+"""
+manage_token supply.
+
+Same tokens as secrets.token_urlsafe(16) (16 random bytes, base64url, no padding),
+but read from the OS in batches: one os.urandom() call per TOKEN_BATCH tokens
+instead of one getrandom() per found report. The pool is topped up in a
+background thread once it drops below TOKEN_LOW_WATER.
+"""
+from __future__ import annotations
+
+import base64
+import os
+import secrets
+import threading
+from collections import deque
+
+TOKEN_BYTES = 16
+TOKEN_BATCH = 1024
+TOKEN_LOW_WATER = 128
+
+_pool: deque[str] = deque()
+_refilling = threading.Lock()
+
+
+def _refill() -> None:
+    try:
+        raw = os.urandom(TOKEN_BYTES * TOKEN_BATCH)
+        _pool.extend(
+            base64.urlsafe_b64encode(raw[i:i + TOKEN_BYTES]).rstrip(b"=").decode("ascii")
+            for i in range(0, len(raw), TOKEN_BYTES)
+        )
+    finally:
+        _refilling.release()
+
+
+def _maybe_refill() -> None:
+    if len(_pool) < TOKEN_LOW_WATER and _refilling.acquire(blocking=False):
+        threading.Thread(target=_refill, name="token-refill", daemon=True).start()
+
+
+def get_manage_token() -> str:
+    """A fresh, unguessable token (each one is handed out once)."""
+    _maybe_refill()
+    try:
+        return _pool.popleft()
+    except IndexError:
+        # pool empty (first calls, or a burst outran the refill)
+        return secrets.token_urlsafe(TOKEN_BYTES)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Make an existing user an office user (role='office').
+Make existing users office users (role='office'): one with --phone, or a list with --phones-file.
 
 Why this exists:
 - Many Windows machines don't have the sqlite3 CLI installed.
@@ -14,25 +14,51 @@ import sqlite3
 from pathlib import Path
 
 
+class _DigitsOnly(dict):
+    """str.translate table deleting non-digits (same rule as str.isdigit); nothing is stored past Latin-1."""
+
+    def __missing__(self, cp: int) -> int | None:
+        return cp if chr(cp).isdigit() else None
+
+
+_DIGITS_ONLY = _DigitsOnly((cp, cp if chr(cp).isdigit() else None) for cp in range(256))
+
+
 def normalize_phone(phone: str) -> str:
     # Simple normalization: keep digits, keep leading 0 if present
-    digits = "".join(ch for ch in (phone or "") if ch.isdigit())
-    # If someone types 88017..., reduce to last 11 digits if it looks like BD phone
-    if len(digits) > 11 and digits.endswith(digits[-11:]):
+    digits = (phone or "").translate(_DIGITS_ONLY)
+    # If someone types 88017..., reduce to the last 11 digits (BD phone length)
+    if len(digits) > 11:
         digits = digits[-11:]
     return digits
 
 
+def read_phones(path: str) -> list[str]:
+    """One phone per line; blank lines and lines starting with # are skipped."""
+    phones: list[str] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            phones.append(normalize_phone(line))
+    # same phone twice -> promote once
+    return list(dict.fromkeys(phones))
+
+
 def main() -> int:
     root = Path(__file__).resolve().parent.parent
     default_db = root / "lostfound.sqlite3"
 
     p = argparse.ArgumentParser()
-    p.add_argument("--phone", required=True, help="User phone (example: 017xxxxxxxx)")
+    who = p.add_mutually_exclusive_group(required=True)
+    who.add_argument("--phone", help="User phone (example: 017xxxxxxxx)")
+    who.add_argument("--phones-file", help="Text file with one phone per line (promotes them all at once)")
     p.add_argument("--db", default=str(default_db), help="Path to DB (default: ./lostfound.sqlite3)")
     args = p.parse_args()
 
-    phone = normalize_phone(args.phone)
+    if args.phones_file:
+        phones = read_phones(args.phones_file)
+    else:
+        phones = [normalize_phone(args.phone)]
     db_path = Path(args.db).resolve()
 
     if not db_path.exists():
@@ -40,36 +66,64 @@ def main() -> int:
         print("Run the app once to auto-create the DB, then try again.")
         return 2
 
-    con = sqlite3.connect(str(db_path))
-    cur = con.cursor()
-
-    # Make sure users table exists
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-    if not cur.fetchone():
-        print("[ERROR] 'users' table not found. Your DB doesn't look initialized.")
-        print("Run the app once (it runs init_db on startup), then try again.")
+    # timeout = busy timeout: if the app is writing right now, wait for it instead
+    # of failing with "database is locked"
+    con = sqlite3.connect(str(db_path), timeout=5.0)
+    try:
+        # Same journal settings as the app (init_db/connect). WAL is normally already on
+        # (it is stored in the DB file); a DB on a read-only or odd filesystem that
+        # can't switch just keeps its current mode.
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            pass
+        con.execute("PRAGMA synchronous=NORMAL")
+        cur = con.cursor()
+
+        # One write transaction for everything. Per phone the common case is a single
+        # statement: UPDATE ... RETURNING says who got promoted; only when it matches
+        # nothing do we look again to tell "already office" from "not registered".
+        # (users.phone is UNIQUE, so both are index seeks.)
+        promoted = []
+        missing = 0
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            for phone in phones:
+                cur.execute(
+                    "UPDATE users SET role='office' WHERE phone=? AND role<>'office' RETURNING id, name, phone",
+                    (phone,),
+                )
+                row = cur.fetchone()
+                if row:
+                    promoted.append(row)
+                    continue
+
+                cur.execute("SELECT id, name, phone FROM users WHERE phone=?", (phone,))
+                row = cur.fetchone()
+                if row:
+                    user_id, name, phone_db = row
+                    print(f"[OK] Already office: id={user_id}, name={name}, phone={phone_db}")
+                else:
+                    print(f"[ERROR] No user found with phone={phone}")
+                    missing += 1
+            con.commit()
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            print("[ERROR] 'users' table not found. Your DB doesn't look initialized.")
+            print("Run the app once (it runs init_db on startup), then try again.")
+            return 3
+        # refresh planner stats if they look stale (usually a no-op; cheap either way)
+        con.execute("PRAGMA optimize")
+    finally:
         con.close()
-        return 3
 
-    cur.execute("SELECT id, name, phone, role FROM users WHERE phone=?", (phone,))
-    row = cur.fetchone()
-    if not row:
-        print(f"[ERROR] No user found with phone={phone}")
-        print("Register that phone in the app first, then re-run this script.")
-        con.close()
-        return 4
+    for user_id, name, phone_db in promoted:
+        print(f"[OK] Updated to office: id={user_id}, name={name}, phone={phone_db}")
 
-    user_id, name, phone_db, role = row
-    if role == "office":
-        print(f"[OK] Already office: id={user_id}, name={name}, phone={phone_db}")
-        con.close()
-        return 0
-
-    cur.execute("UPDATE users SET role='office' WHERE id=?", (user_id,))
-    con.commit()
-    con.close()
-
-    print(f"[OK] Updated to office: id={user_id}, name={name}, phone={phone_db}")
+    if missing:
+        print("Register missing phones in the app first, then re-run this script.")
+        return 4
     return 0
 
 
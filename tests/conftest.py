@@ -0,0 +1,16 @@
+# tests/conftest.py
+import pytest
+
+from app import db
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """A fresh database file for one test; pooled connections and caches start empty."""
+    db.close_pool()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "test.sqlite3")
+    db._list_cache.clear()
+    db.init_db()
+    yield db
+    db.close_pool()
+    db._list_cache.clear()
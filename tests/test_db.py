@@ -0,0 +1,87 @@
+# tests/test_db.py
+import pytest
+
+from app.nlp import dumps_extracted, extract
+
+
+def _report(db, kind, title, description="", location_text="Dhanmondi"):
+    ex = extract(f"{title}\n{description}\n{location_text}")
+    return db.insert_report(kind, title, description, location_text, None, dumps_extracted(ex))
+
+
+def test_create_user_rejects_a_taken_phone(temp_db):
+    uid = temp_db.create_user("Asha", "01712345678", "1234567890", "hash")
+    assert uid is not None
+    assert temp_db.create_user("Someone else", "01712345678", "999", "hash2") is None
+    assert temp_db.get_user_by_phone("01712345678")["name"] == "Asha"
+
+
+def test_user_generation_moves_after_commit(temp_db):
+    uid = temp_db.create_user("Asha", "01712345678", "1234567890", "hash")
+    before = temp_db.user_generation(uid)
+
+    with temp_db.transaction() as con:
+        temp_db.set_user_role(uid, "office", con=con)
+        assert temp_db.user_generation(uid) == before
+    after = temp_db.user_generation(uid)
+    assert after != before
+
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction() as con:
+            temp_db.set_user_role(uid, "user", con=con)
+            raise RuntimeError("rolled back")
+    assert temp_db.user_generation(uid) == after
+    assert temp_db.get_user_by_id(uid)["role"] == "office"
+
+
+def test_list_cache_sees_this_process_writes(temp_db):
+    assert temp_db.list_reports("lost") == []
+    rid = _report(temp_db, "lost", "Black wallet")
+    assert [r["id"] for r in temp_db.list_reports("lost")] == [rid]
+
+    temp_db.close_report(rid)
+    assert temp_db.list_reports("lost") == []
+    assert [r["id"] for r in temp_db.list_reports("lost", include_closed=True)] == [rid]
+
+
+def test_list_cache_expires_for_outside_writes(temp_db, monkeypatch):
+    assert temp_db.list_reports("found") == []
+    # written on a connection of its own, as another worker would: no generation bump
+    con = temp_db.connect()
+    con.execute(
+        "INSERT INTO reports(kind,title,description,location_text,created_at,extracted_json) "
+        "VALUES('found','Umbrella','','Gulshan',?,'{}')",
+        (temp_db.now_utc_iso(),),
+    )
+    con.commit()
+    con.close()
+    assert temp_db.list_reports("found") == []
+
+    later = temp_db.time.monotonic() + temp_db.LIST_CACHE_TTL + 1
+    monkeypatch.setattr(temp_db.time, "monotonic", lambda: later)
+    assert [r["title"] for r in temp_db.list_reports("found")] == ["Umbrella"]
+
+
+def test_list_reports_returns_copies_of_the_cached_list(temp_db):
+    _report(temp_db, "lost", "Blue umbrella")
+    temp_db.list_reports("lost").clear()
+    assert len(temp_db.list_reports("lost")) == 1
+
+
+def test_fts_search_follows_inserts_updates_and_closes(temp_db):
+    if not temp_db.FTS_ENABLED:
+        pytest.skip("sqlite built without FTS5")
+
+    wallet = _report(temp_db, "found", "Brown wallet", "leather, found near the gate")
+    _report(temp_db, "found", "Umbrella", "black, folding")
+    assert temp_db.search_report_ids("found", ["wallet"]) == [wallet]
+    assert temp_db.search_report_ids("lost", ["wallet"]) == []
+    assert temp_db.search_report_ids("found", []) == []
+
+    with temp_db.transaction() as con:
+        con.execute("UPDATE reports SET title='Brown purse' WHERE id=?", (wallet,))
+    assert temp_db.search_report_ids("found", ["wallet"]) == []
+    assert temp_db.search_report_ids("found", ["purse"]) == [wallet]
+
+    temp_db.close_report(wallet)
+    assert temp_db.search_report_ids("found", ["purse"]) == []
@@ -0,0 +1,39 @@
+# tests/test_main.py
+from starlette.responses import HTMLResponse
+from starlette.testclient import TestClient
+
+from app import main
+
+
+def test_closed_lost_report_shows_approved_claims_not_matches(temp_db, monkeypatch):
+    # render straight through the app's Jinja environment, whatever TemplateResponse
+    # signature the installed Starlette expects
+    def render(name, context, status_code=200):
+        return HTMLResponse(main.templates.env.get_template(name).render(context), status_code=status_code)
+
+    monkeypatch.setattr(main.templates, "TemplateResponse", render)
+    found = temp_db.insert_report(
+        "found", "Black wallet", "leather", "Dhanmondi", None, "{}",
+        handover_location="Library front desk", contact_info="Ask for the guard",
+    )
+    with TestClient(main.app) as client:
+        client.post(
+            "/register",
+            data={"name": "Asha", "phone": "01712345678", "nid": "1234567890123", "password": "a long password"},
+            follow_redirects=False,
+        )
+        uid = temp_db.get_user_by_phone("01712345678")["id"]
+        lost = temp_db.insert_report("lost", "Black wallet", "leather", "Dhanmondi", None, "{}", owner_user_id=uid)
+
+        assert "Top matches" in client.get(f"/report/{lost}").text
+
+        claim = temp_db.create_claim(lost, found, "brown stitching inside", claimer_user_id=uid)
+        temp_db.set_claim_status(claim, "approved")
+        temp_db.close_report(lost, closed_claim_id=claim)
+        page = client.get(f"/report/{lost}").text
+
+    # settled: no matches panel; the approved claim keeps its pickup details
+    assert "Top matches" not in page
+    assert "Approved claims" in page
+    assert f"/report/{found}" in page
+    assert "Library front desk" in page
@@ -0,0 +1,86 @@
+# tests/test_matching.py
+import pytest
+
+from app import main, matching
+from app.nlp import dumps_extracted, extract
+
+
+def _row(report_id, title, description, location_text):
+    ex = extract(f"{title}\n{description}\n{location_text}")
+    return {
+        "id": report_id,
+        "title": title,
+        "description": description,
+        "location_text": location_text,
+        "event_time": None,
+        "extracted_json": dumps_extracted(ex),
+    }
+
+
+CURRENT = _row(-1, "Black Samsung phone", "IMEI 356938035643809, cracked screen", "Mirpur 10")
+# same phone, same IMEI, worded differently
+SAME_IMEI = _row(3, "Samsung phone, black", "cracked screen; IMEI 356938035643809", "Mirpur-10")
+# near-identical text, no identifier
+LOOKALIKE = _row(4, "Black Samsung phone", "cracked screen", "Mirpur 10")
+
+
+def test_duplicate_ignores_letter_case():
+    shouting = _row(-1, "LOST BLACK SAMSUNG PHONE", "CRACKED SCREEN, BLUE CASE", "CENTRAL LIBRARY")
+    quiet = _row(7, "lost black samsung phone", "cracked screen, blue case", "central library")
+    assert matching.find_duplicate(shouting, [quiet]) == 7
+
+
+def test_duplicate_is_the_best_scoring_candidate():
+    assert matching.find_duplicate(CURRENT, [LOOKALIKE, SAME_IMEI]) == 3
+
+
+def test_duplicate_sharing_an_identifier():
+    assert matching.find_duplicate(CURRENT, [SAME_IMEI]) == 3
+
+
+def test_no_duplicate_without_overlap():
+    other = _row(5, "Blue umbrella", "folding", "Gulshan 2")
+    assert matching.find_duplicate(CURRENT, [other]) is None
+    assert matching.find_duplicate(CURRENT, []) is None
+
+
+def test_match_candidates_prefilters_large_pools(temp_db, monkeypatch):
+    if not temp_db.FTS_ENABLED:
+        pytest.skip("sqlite built without FTS5")
+    monkeypatch.setattr(main, "FTS_PREFILTER_MIN", 2)
+
+    ids = [
+        temp_db.insert_report("found", title, "", "Gulshan", None, "{}")
+        for title in ("Samsung phone", "Blue umbrella", "Red backpack")
+    ]
+    pool = temp_db.list_reports("found")
+    assert [c["id"] for c in main.match_candidates("found", CURRENT, pool)] == [ids[0]]
+
+    # nothing shares a word: the newest reports are still scored
+    stranger = _row(-1, "Xyzzy", "", "")
+    assert main.match_candidates("found", stranger, pool) == pool[:2]
+
+
+def test_match_candidates_keeps_shared_identifiers(temp_db, monkeypatch):
+    if not temp_db.FTS_ENABLED:
+        pytest.skip("sqlite built without FTS5")
+    monkeypatch.setattr(main, "FTS_PREFILTER_MIN", 2)
+    monkeypatch.setattr(main, "FTS_PREFILTER_LIMIT", 1)
+
+    lookalike = temp_db.insert_report("found", "Black Samsung phone", "cracked screen", "Mirpur 10", None, "{}")
+    temp_db.insert_report("found", "Blue umbrella", "", "Gulshan", None, "{}")
+    # shares only the IMEI with CURRENT, in a long text: full-text search ranks it below LOOKALIKE
+    imei = _row(None, "Handset", "left on a bus seat near the last stop, number on the box 356938035643809", "Uttara")
+    imei["id"] = temp_db.insert_report("found", imei["title"], imei["description"], "Uttara", None, imei["extracted_json"])
+    assert temp_db.search_report_ids("found", ["356938035643809", "black", "samsung", "cracked"], limit=1) == [lookalike]
+
+    pool = temp_db.list_reports("found")
+    assert [c["id"] for c in main.match_candidates("found", CURRENT, pool)] == [imei["id"], lookalike]
+
+
+def test_check_duplicate_does_not_use_the_full_text_shortlist(temp_db, monkeypatch):
+    monkeypatch.setattr(main, "match_candidates", lambda *args: [])
+    rid = temp_db.insert_report(
+        "lost", SAME_IMEI["title"], SAME_IMEI["description"], SAME_IMEI["location_text"], None, SAME_IMEI["extracted_json"]
+    )
+    assert main.check_duplicate("lost", CURRENT) == rid
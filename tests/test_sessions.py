@@ -0,0 +1,81 @@
+# tests/test_sessions.py
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app import sessions
+from app.sessions import SignedCookieSessionMiddleware
+
+
+def _middleware(**kwargs):
+    return SignedCookieSessionMiddleware(app=None, secret_key="test-secret", **kwargs)
+
+
+def test_round_trip():
+    mw = _middleware()
+    assert mw.loads(mw.dumps({"user_id": 7})) == {"user_id": 7}
+
+
+def test_tampered_payload_is_rejected():
+    mw = _middleware()
+    payload, issued, tag = mw.dumps({"user_id": 7}).split(".")
+    forged = sessions._b64e(b'{"user_id":1}')
+    assert mw.loads(f"{forged}.{issued}.{tag}") is None
+
+
+def test_tampered_timestamp_is_rejected():
+    mw = _middleware()
+    payload, issued, tag = mw.dumps({"user_id": 7}).split(".")
+    assert mw.loads(f"{payload}.{int(issued) + 60}.{tag}") is None
+
+
+def test_other_key_and_garbage_are_rejected():
+    value = _middleware().dumps({"user_id": 7})
+    other = SignedCookieSessionMiddleware(app=None, secret_key="another-secret")
+    assert other.loads(value) is None
+    assert other.loads("not-a-cookie") is None
+    assert other.loads("") is None
+
+
+def test_expired_cookie_is_rejected(monkeypatch):
+    mw = _middleware(max_age=60)
+    value = mw.dumps({"user_id": 7})
+    now = sessions.time.time()
+    monkeypatch.setattr(sessions.time, "time", lambda: now + 61)
+    assert mw.loads(value) is None
+
+
+def test_fallback_key_is_accepted_and_reissued():
+    old = _middleware()
+    value = old.dumps({"user_id": 7})
+    rotated = SignedCookieSessionMiddleware(app=None, secret_key="new-secret", fallback_secret_keys=["test-secret"])
+    assert rotated._load(value) == ({"user_id": 7}, True)
+    assert old._load(value) == ({"user_id": 7}, False)
+
+
+def _client():
+    async def whoami(request):
+        return JSONResponse({"user_id": request.session.get("user_id")})
+
+    async def login(request):
+        request.session["user_id"] = 7
+        return JSONResponse({})
+
+    app = Starlette(routes=[Route("/whoami", whoami), Route("/login", login)])
+    app.add_middleware(SignedCookieSessionMiddleware, secret_key="test-secret")
+    return TestClient(app)
+
+
+def test_middleware_ignores_a_tampered_cookie():
+    client = _client()
+    login = client.get("/login")
+    assert "set-cookie" in login.headers
+    assert client.get("/whoami").json() == {"user_id": 7}
+    # an unchanged session is not re-sent
+    assert "set-cookie" not in client.get("/whoami").headers
+
+    payload, issued, tag = client.cookies["session"].split(".")
+    forged = sessions._b64e(b'{"user_id":1}')
+    client.cookies.set("session", f"{forged}.{issued}.{tag}")
+    assert client.get("/whoami").json() == {"user_id": None}